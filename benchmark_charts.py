@@ -0,0 +1,55 @@
+import argparse
+import sys
+from pathlib import Path
+
+from cohort.bench import (
+    BASELINE_PATH,
+    RESULTS_PATH,
+    compare,
+    format_comparison,
+    format_results,
+    load_results,
+    run_benchmarks,
+    save_results,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark workbook loading and chart generation")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Runs per stage (the median is reported)")
+    parser.add_argument("--quick", action="store_true",
+                        help="Skip the full 7-dimension regeneration stage")
+    parser.add_argument("--data", action="store_true",
+                        help="Also run the employee-record stages (1M synthetic employees)")
+    parser.add_argument("--out", default=str(RESULTS_PATH), help="Where to write the JSON results")
+    parser.add_argument("--baseline", default=str(BASELINE_PATH),
+                        help="Baseline JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="Store this run as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Allowed slowdown vs. the baseline before failing (0.10 = 10%%)")
+    args = parser.parse_args()
+
+    results = run_benchmarks(repeat=args.repeat, include_full=not args.quick,
+                             include_data=args.data)
+    print(format_results(results))
+    print(f"\nResults written to {save_results(results, args.out)}")
+
+    if args.save_baseline:
+        print(f"Baseline written to {save_results(results, args.baseline)}")
+        return 0
+
+    if not Path(args.baseline).exists():
+        print("No baseline to compare against (run with --save-baseline first)")
+        return 0
+
+    rows = compare(results, load_results(args.baseline), args.threshold)
+    print()
+    print(format_comparison(rows, args.threshold))
+    return 1 if any(row[4] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,11 @@
+from .cache import LoadInfo, load_table
+from .cube import CohortCube
+from .employees import aggregate_employees, employee_cube, employee_retention, employee_triangle
+from .workbook import (
+    COHORTS,
+    DIMENSIONS,
+    METRICS,
+    WORKBOOK_PATH,
+    CohortTable,
+    load_workbook,
+)
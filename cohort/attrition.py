@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+
+
+def completed_months(start, end):
+    """Whole calendar months completed between two datetime64 arrays
+
+    Joining on the 15th, the first month is completed on the 15th of the next
+    month. Pure array arithmetic on month and day numbers; NaT is not allowed.
+    """
+    start = np.asarray(start, dtype="datetime64[D]")
+    end = np.asarray(end, dtype="datetime64[D]")
+    start_month = start.astype("datetime64[M]")
+    end_month = end.astype("datetime64[M]")
+    months = (end_month - start_month).astype(np.int64)
+    start_day = (start - start_month.astype("datetime64[D]")).astype(np.int64)
+    end_day = (end - end_month.astype("datetime64[D]")).astype(np.int64)
+    return months - (end_day < start_day)
+
+
+def months_after(start, months):
+    """First date on which `months` whole months are completed since each start date
+
+    The inverse of completed_months: completed_months(start, d) >= months
+    exactly when d >= months_after(start, months). A start day missing from
+    the target month (e.g. the 31st) rolls over to the next month's first day.
+    """
+    start = np.asarray(start, dtype="datetime64[D]")
+    start_month = start.astype("datetime64[M]")
+    target = start_month + months
+    day = start - start_month.astype("datetime64[D]")
+    return np.minimum(target.astype("datetime64[D]") + day, (target + 1).astype("datetime64[D]"))
+
+
+def exit_months(joining_date, exit_date, as_of):
+    """Completed residency months at exit, or -1 for employees still active on `as_of`"""
+    joining = np.asarray(joining_date, dtype="datetime64[D]")
+    exit_date = np.asarray(exit_date, dtype="datetime64[D]")
+    left = ~np.isnat(exit_date) & (exit_date <= np.datetime64(as_of, "D"))
+    months = np.full(len(joining), -1, dtype=np.int64)
+    months[left] = np.maximum(completed_months(joining[left], exit_date[left]), 0)
+    return months
+
+
+def left_within(months_at_exit, months):
+    """Employees who left within their first `months` residency months"""
+    return (months_at_exit >= 0) & (months_at_exit < months)
+
+
+def stacked_slots(codes):
+    """One slot per (dimension, category) for all dimensions at once
+
+    `codes` maps dimensions to (integer codes, labels). Returns the slot of
+    every row for each dimension in turn (dimension-major, unknown codes in a
+    spare last slot) and the (dimension, category) index of the slots.
+    """
+    offsets = np.cumsum([0, *(len(labels) for _, labels in codes.values())])
+    slots = np.concatenate([np.where(dim_codes >= 0, dim_codes + offset, offsets[-1])
+                            for (dim_codes, _), offset in zip(codes.values(), offsets)])
+    index = pd.MultiIndex.from_tuples(
+        [(d, label) for d, (_, labels) in codes.items() for label in labels],
+        names=["dimension", "category"])
+    return slots, index
+
+
+def slot_histogram(slots, bucket, n_slots, width, weights=None):
+    """(n_slots, width) counts of slot x bucket from one bincount (spare slot dropped)"""
+    histogram = np.bincount(slots * width + bucket, weights, (n_slots + 1) * width)
+    return histogram.reshape(n_slots + 1, width)[:-1]
+
+
+def window_label(first, within):
+    """Column name of a window pair, e.g. '6/12' or '6/joined'"""
+    return f"{first}/{within if within is not None else 'joined'}"
+
+
+def attrition_windows(joining_date, exit_date, codes, windows, as_of):
+    """Attrition ratios for arbitrary window pairs and every category of every dimension
+
+    `codes` maps dimensions to (integer codes, labels) and `windows` lists
+    (first, within) pairs: employees who left within `first` months as a
+    share of those who left within `within` months (None: of all joined),
+    e.g. [(6, None), (6, 12), (6, 23), (3, 12)]. One bincount builds a
+    (category, month of exit) histogram for all dimensions at once; each
+    window is then a lookup in its cumulative sum.
+    Returns a DataFrame indexed by (dimension, category).
+    """
+    months = exit_months(joining_date, exit_date, as_of)
+    horizon = max(max(first, within or 0) for first, within in windows)
+    # Column m < horizon counts exits after m completed months, column
+    # `horizon` later exits and the last column employees still active
+    width = horizon + 2
+    bucket = np.where(months >= 0, np.minimum(months, horizon), horizon + 1)
+
+    slots, index = stacked_slots(codes)
+    histogram = slot_histogram(slots, np.tile(bucket, len(codes)), len(index), width)
+    joined = histogram.sum(axis=1)
+    cumulative = np.cumsum(histogram, axis=1)
+
+    def left(m):
+        """Employees who left within m months, per category"""
+        return cumulative[:, m - 1] if m > 0 else np.zeros(len(joined), dtype=np.int64)
+
+    columns = {"joined": joined, "attrited": joined - histogram[:, -1]}
+    with np.errstate(invalid="ignore", divide="ignore"):
+        for first, within in windows:
+            denominator = joined if within is None else left(within)
+            columns[window_label(first, within)] = np.where(denominator > 0,
+                                                            left(first) / denominator, np.nan)
+    return pd.DataFrame(columns, index=index)
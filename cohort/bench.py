@@ -0,0 +1,244 @@
+import gc
+import io
+import json
+import platform
+import resource
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import pandas as pd
+
+from .cache import CACHE_DIR, load_table
+from .charts import CHART_SPECS, DPI, chart_slice
+from .employees import aggregate_employees
+from .ledger import RevenueStore, first_sale_months
+from .render import apply_style, build_figure, layout_figure, render_all
+from .render_cache import library_versions
+from .synthetic import synthetic_employees, synthetic_ledger
+from .workbook import WORKBOOK_PATH, load_workbook
+
+BENCH_DIR = CACHE_DIR.parent / "bench"
+RESULTS_PATH = BENCH_DIR / "latest.json"
+BASELINE_PATH = BENCH_DIR / "baseline.json"
+
+# Dimension with the most categories; used for the per-family stages
+BENCH_DIMENSION = "Designation"
+
+# Synthetic employee records for the aggregation stages
+BENCH_EMPLOYEES = 1_000_000
+
+# Short stage names for the five plot families
+FAMILY_STAGES = {
+    "Plot1 Head Count": "head_count",
+    "Plot2 Performance Indicators KPI Combined": "kpi_combined",
+    "Plot3 Performance Indicators KPI 1": "kpi_1",
+    "Plot4 Revenue Indicators": "revenue",
+    "Plot5 Attrition Indicators": "attrition",
+}
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far, in MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS reports bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def reset_peak_rss():
+    """Restart this process's peak RSS mark (Linux VmHWM); False where that is not possible"""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def stage_peak_rss_mb():
+    """Peak resident set size since the last reset_peak_rss(), in MB"""
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    raise OSError("VmHWM missing from /proc/self/status")
+
+
+def peak_alloc_mb(fn, setup=None):
+    """Peak memory allocated by one fn() call above what was allocated before it, in MB
+
+    The fallback where the peak RSS cannot be reset: tracemalloc covers
+    Python and NumPy allocations only (not e.g. Agg's raster buffers), and
+    tracing slows allocation down, so this is a separate, untimed run.
+    """
+    arg = setup() if setup else None
+    tracemalloc.start()
+    try:
+        fn(arg) if setup else fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 2**20
+
+
+def measure(fn, repeat, setup=None, memory=True):
+    """Median wall and CPU time of fn() over `repeat` runs; setup() output is passed to fn
+
+    With `memory`, the stage's own peak RSS (peak_rss_mb) is taken over the
+    timed runs: the kernel's peak mark is reset before each run, so earlier
+    stages do not show through. Where that is unsupported, one more run
+    measures the peak allocation with tracemalloc instead (peak_alloc_mb).
+    """
+    walls, cpus, peaks = [], [], []
+    for _ in range(repeat):
+        arg = setup() if setup else None
+        # Figures of earlier runs sit in reference cycles; free them before the mark
+        gc.collect()
+        tracked = memory and reset_peak_rss()
+        wall, cpu = time.perf_counter(), time.process_time()
+        fn(arg) if setup else fn()
+        walls.append(time.perf_counter() - wall)
+        cpus.append(time.process_time() - cpu)
+        if tracked:
+            peaks.append(stage_peak_rss_mb())
+    result = {
+        "wall_s": statistics.median(walls),
+        "cpu_s": statistics.median(cpus),
+        "repeat": repeat,
+    }
+    if peaks:
+        result["peak_rss_mb"] = round(max(peaks), 1)
+    elif memory:
+        result["peak_alloc_mb"] = round(peak_alloc_mb(fn, setup), 1)
+    return result
+
+
+def _ledger_chunks(store, columns=("employee", "sale_date")):
+    """A spilled ledger streamed back one month partition at a time"""
+    for month in store.months():
+        yield pd.DataFrame(store.read(month, columns))
+
+
+def run_benchmarks(repeat=3, full_repeat=1, dpi=DPI, include_full=True, include_data=False):
+    """Run every stage and return the results document
+
+    The employee-record stages (`include_data`, BENCH_EMPLOYEES synthetic
+    employees) run last, so their large allocations do not sit under the
+    chart stages.
+    """
+    apply_style()
+    stages = {}
+
+    stages["workbook_load"] = measure(lambda: load_workbook(WORKBOOK_PATH), repeat)
+    load_table()  # Warm the parse cache so the next stage measures hits only
+    stages["workbook_load_cached"] = measure(load_table, repeat)
+
+    table = load_table()
+    for family, name in FAMILY_STAGES.items():
+        spec = CHART_SPECS[family]
+        data = chart_slice(table, family, BENCH_DIMENSION)
+
+        stages[f"build_{name}"] = measure(lambda: build_figure(spec, data), repeat)
+        stages[f"tight_layout_{name}"] = measure(
+            lambda fig: layout_figure(fig, spec), repeat,
+            setup=lambda: build_figure(spec, data))
+
+        def laid_out():
+            fig = build_figure(spec, data)
+            layout_figure(fig, spec)
+            return fig
+
+        stages[f"png_{name}"] = measure(
+            lambda fig: fig.savefig(io.BytesIO(), format="png", dpi=dpi, bbox_inches="tight"),
+            repeat, setup=laid_out)
+
+    if include_full:
+        with tempfile.TemporaryDirectory() as out_root:
+            stages["full_regeneration"] = measure(
+                lambda: render_all(table, out_root=out_root, dpi=dpi, cache=False), full_repeat)
+
+    if include_data:
+        employees = synthetic_employees(BENCH_EMPLOYEES)
+        stages["aggregate_employees"] = measure(lambda: aggregate_employees(employees), repeat)
+        # The ledger is generated and spilled to disk first, so the stage times only
+        # streaming it back and reducing it
+        with tempfile.TemporaryDirectory() as root:
+            store = RevenueStore(root).ingest(synthetic_ledger(employees))
+            stages["first_sale_ledger"] = measure(
+                lambda: first_sale_months(_ledger_chunks(store), employees["joining_date"]), 1)
+        del employees
+
+    return {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "platform": platform.platform(),
+            "libraries": library_versions(),
+            "dpi": dpi,
+            "dimension": BENCH_DIMENSION,
+            "employees": BENCH_EMPLOYEES if include_data else None,
+            # Process-wide, so only meaningful for the run as a whole
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+        },
+        "stages": stages,
+    }
+
+
+def save_results(results, path=RESULTS_PATH):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    return path
+
+
+def load_results(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare(results, baseline, threshold=0.10, metric="wall_s"):
+    """Rows (stage, baseline, current, change, regressed) for stages present in both runs
+
+    A stage regresses when it is slower than the baseline by more than
+    `threshold` (0.10 == 10%).
+    """
+    rows = []
+    for stage, current in results["stages"].items():
+        base = baseline["stages"].get(stage)
+        if base is None or not base.get(metric):
+            continue
+        change = current[metric] / base[metric] - 1
+        rows.append((stage, base[metric], current[metric], change, change > threshold))
+    return rows
+
+
+def format_results(results):
+    lines = [f"{'stage':28} {'wall (s)':>10} {'cpu (s)':>10} {'peak RSS (MB)':>16}"]
+    traced = False
+    for stage, r in results["stages"].items():
+        if r.get("peak_rss_mb") is not None:
+            peak = f"{r['peak_rss_mb']:.1f}"
+        elif r.get("peak_alloc_mb") is not None:
+            peak, traced = f"{r['peak_alloc_mb']:.1f}*", True
+        else:
+            peak = "-"
+        lines.append(f"{stage:28} {r['wall_s']:10.4f} {r['cpu_s']:10.4f} {peak:>16}")
+    if traced:
+        lines.append("* peak tracemalloc allocation (peak RSS cannot be reset here)")
+    lines.append(f"\nPeak RSS of the whole run: {results['meta']['peak_rss_mb']:.1f} MB")
+    return "\n".join(lines)
+
+
+def format_comparison(rows, threshold):
+    lines = [f"{'stage':28} {'baseline':>10} {'current':>10} {'change':>8}"]
+    for stage, base, current, change, regressed in rows:
+        flag = "  REGRESSION" if regressed else ""
+        lines.append(f"{stage:28} {base:10.4f} {current:10.4f} {change:+8.1%}{flag}")
+    regressions = sum(1 for row in rows if row[4])
+    lines.append(f"\n{regressions} regression(s) above the {threshold:.0%} threshold")
+    return "\n".join(lines)
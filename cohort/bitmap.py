@@ -0,0 +1,209 @@
+import numpy as np
+
+# Rows per container (the low 16 bits of a row number address a row inside it)
+CONTAINER_ROWS = 1 << 16
+# Containers with more rows than this are stored as bitmaps (8 KB), others as
+# sorted uint16 arrays (2 bytes per row), as in roaring bitmaps
+ARRAY_LIMIT = 4096
+
+
+def _popcount(words):
+    if hasattr(np, "bitwise_count"):
+        return int(np.bitwise_count(words).sum())
+    return int(np.unpackbits(words.view(np.uint8)).sum())
+
+
+def _dense(low):
+    """1024-word bitmap of the given rows of one container"""
+    bits = np.zeros(CONTAINER_ROWS, dtype=bool)
+    bits[low] = True
+    return np.packbits(bits, bitorder="little").view(np.uint64)
+
+
+def _rows(container):
+    """Sorted rows (uint16) of a container"""
+    if container.dtype == np.uint16:
+        return container
+    bits = np.unpackbits(container.view(np.uint8), bitorder="little")
+    return np.flatnonzero(bits).astype(np.uint16)
+
+
+def _compact(container):
+    """Store a container in its smaller form; None when empty"""
+    if container.dtype == np.uint16:
+        return container if len(container) else None
+    count = _popcount(container)
+    if count == 0:
+        return None
+    return _rows(container) if count <= ARRAY_LIMIT else container
+
+
+def _and(a, b):
+    if a.dtype == np.uint64 and b.dtype == np.uint64:
+        return _compact(a & b)
+    if a.dtype == np.uint64:
+        a, b = b, a
+    if b.dtype == np.uint64:
+        # Array x bitmap: test each array row's bit
+        hit = (b[a >> 6] >> (a & 63).astype(np.uint64)) & np.uint64(1)
+        return _compact(a[hit.astype(bool)])
+    return _compact(np.intersect1d(a, b, assume_unique=True))
+
+
+def _or(a, b):
+    if a.dtype == np.uint16 and b.dtype == np.uint16 and len(a) + len(b) <= ARRAY_LIMIT:
+        return np.union1d(a, b)
+    words = a if a.dtype == np.uint64 else _dense(a)
+    other = b if b.dtype == np.uint64 else _dense(b)
+    return _compact(words | other)
+
+
+def _andnot(a, b):
+    words = (a if a.dtype == np.uint64 else _dense(a)) & ~(b if b.dtype == np.uint64 else _dense(b))
+    return _compact(words)
+
+
+class Bitmap:
+    """Compressed set of row numbers in the roaring layout
+
+    Rows are split into containers of 2**16 by their high bits; a container
+    holds its low bits as a sorted uint16 array while sparse and as a
+    1024-word uint64 bitmap once it has more than ARRAY_LIMIT rows. AND / OR /
+    AND-NOT work container by container on whichever forms meet, and the
+    cardinality of a bitmap container is a popcount of its words.
+    """
+
+    __slots__ = ("n_rows", "containers")
+
+    def __init__(self, n_rows, containers=None):
+        self.n_rows = n_rows
+        self.containers = containers or {}  # {high bits: uint16 rows or uint64 words}
+
+    @classmethod
+    def from_rows(cls, rows, n_rows):
+        """Bitmap of sorted, unique row numbers"""
+        rows = np.asarray(rows, dtype=np.int64)
+        high = rows >> 16
+        bounds = np.flatnonzero(np.r_[True, high[1:] != high[:-1], True]) if len(rows) else []
+        containers = {}
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            low = (rows[start:stop] & 0xFFFF).astype(np.uint16)
+            containers[int(high[start])] = low if len(low) <= ARRAY_LIMIT else _dense(low)
+        return cls(n_rows, containers)
+
+    @classmethod
+    def from_mask(cls, mask):
+        mask = np.asarray(mask, dtype=bool)
+        return cls.from_rows(np.flatnonzero(mask), len(mask))
+
+    def __repr__(self):
+        dense = sum(c.dtype == np.uint64 for c in self.containers.values())
+        return (f"Bitmap({len(self)} of {self.n_rows} rows, {len(self.containers)} containers, "
+                f"{dense} dense, {self.nbytes()} bytes)")
+
+    def __len__(self):
+        return sum(len(c) if c.dtype == np.uint16 else _popcount(c) for c in self.containers.values())
+
+    def nbytes(self):
+        return sum(c.nbytes for c in self.containers.values())
+
+    def __and__(self, other):
+        containers = {}
+        for key in self.containers.keys() & other.containers.keys():
+            result = _and(self.containers[key], other.containers[key])
+            if result is not None:
+                containers[key] = result
+        return Bitmap(self.n_rows, containers)
+
+    def __or__(self, other):
+        containers = dict(self.containers)
+        for key, container in other.containers.items():
+            containers[key] = _or(containers[key], container) if key in containers else container
+        return Bitmap(self.n_rows, containers)
+
+    def __sub__(self, other):
+        """AND-NOT: rows of this bitmap that are not in `other`"""
+        containers = {}
+        for key, container in self.containers.items():
+            result = container if key not in other.containers else _andnot(container, other.containers[key])
+            if result is not None:
+                containers[key] = result
+        return Bitmap(self.n_rows, containers)
+
+    def rows(self):
+        """Sorted row numbers"""
+        if not self.containers:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate([(key << 16) + _rows(self.containers[key]).astype(np.int64)
+                               for key in sorted(self.containers)])
+
+    def to_mask(self):
+        mask = np.zeros(self.n_rows, dtype=bool)
+        mask[self.rows()] = True
+        return mask
+
+
+class BitmapIndex:
+    """Bitmaps of every cohort and every category of each dimension, for fast filters
+
+    Keys are (dimension, category), with the cohorts under "Cohort" (e.g.
+    ("Cohort", "CAP 12")). Filters AND the bitmaps of different dimensions
+    and OR the categories listed for one dimension; head counts are
+    bitmap cardinalities, so no employee rows are touched.
+    """
+
+    def __init__(self, n_rows, bitmaps, labels):
+        self.n_rows = n_rows
+        self.bitmaps = bitmaps  # {(dimension, category): Bitmap}
+        self.labels = labels  # {dimension: [category, ...]}
+
+    @classmethod
+    def build(cls, codes, cohorts):
+        """Index over `codes` ({dimension: (codes, labels)}) and `cohorts` ({name: row mask})
+
+        One stable sort per dimension splits its rows by category, already
+        in row order, so every bitmap is built from sorted rows.
+        """
+        n_rows = len(next(iter(cohorts.values())))
+        bitmaps = {("Cohort", name): Bitmap.from_mask(mask) for name, mask in cohorts.items()}
+        labels = {"Cohort": list(cohorts)}
+        for dimension, (dim_codes, dim_labels) in codes.items():
+            order = np.argsort(dim_codes, kind="stable")
+            counts = np.bincount(dim_codes[dim_codes >= 0], minlength=len(dim_labels))
+            start = np.count_nonzero(dim_codes < 0)
+            for label, count in zip(dim_labels, counts):
+                bitmaps[(dimension, label)] = Bitmap.from_rows(order[start:start + count], n_rows)
+                start += count
+            labels[dimension] = list(dim_labels)
+        return cls(n_rows, bitmaps, labels)
+
+    def __repr__(self):
+        size = sum(bitmap.nbytes() for bitmap in self.bitmaps.values())
+        return f"BitmapIndex({self.n_rows} rows, {len(self.bitmaps)} bitmaps, {size / 1e6:.1f} MB)"
+
+    def __getitem__(self, key):
+        return self.bitmaps[key]
+
+    def select(self, where):
+        """Bitmap of the rows matching `where`, e.g. {"Cohort": "CAP 12", "Gender": "Female",
+        "Age group": ["25-28", "28-30"]}"""
+        selected = None
+        for dimension, categories in where.items():
+            if isinstance(categories, str):
+                categories = [categories]
+            bitmap = self.bitmaps[(dimension, categories[0])]
+            for category in categories[1:]:
+                bitmap = bitmap | self.bitmaps[(dimension, category)]
+            selected = bitmap if selected is None else selected & bitmap
+        return selected if selected is not None else Bitmap.from_rows(np.arange(self.n_rows), self.n_rows)
+
+    def count(self, where):
+        """Number of rows matching `where`"""
+        return len(self.select(where))
+
+    def counts(self, dimension, where=None):
+        """{category: rows} of a dimension within the `where` filter (head counts)"""
+        selected = self.select(where) if where else None
+        return {category: len(self.bitmaps[(dimension, category)] if selected is None
+                              else self.bitmaps[(dimension, category)] & selected)
+                for category in self.labels[dimension]}
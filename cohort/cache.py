@@ -0,0 +1,103 @@
+import json
+import os
+import shutil
+import hashlib
+import logging
+import tempfile
+import time
+from collections import namedtuple
+from pathlib import Path
+
+import numpy as np
+
+from .workbook import WORKBOOK_PATH, CohortTable, load_workbook
+
+logger = logging.getLogger(__name__)
+
+# Parsed tables are cached next to the workbook, one folder per content hash
+CACHE_DIR = Path(__file__).resolve().parent.parent / ".cache" / "workbook"
+
+# Bump when the parser or the cache layout changes so old entries are ignored
+CACHE_VERSION = 1
+
+LoadInfo = namedtuple("LoadInfo", ["hit", "seconds", "digest", "path"])
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """SHA-256 of a file's content, read in fixed-size chunks"""
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def cache_entry(digest, cache_dir=CACHE_DIR):
+    """Folder holding the cached table for a workbook digest"""
+    return Path(cache_dir) / f"v{CACHE_VERSION}-{digest[:32]}"
+
+
+def _write_entry(table, entry):
+    """Write values.npy (column-major, one contiguous run per metric) and rows.json atomically"""
+    entry.parent.mkdir(parents=True, exist_ok=True)
+    tmp = Path(tempfile.mkdtemp(prefix=entry.name + ".", dir=entry.parent))
+    try:
+        np.save(tmp / "values.npy", np.asfortranarray(table.values))
+        with open(tmp / "rows.json", "w", encoding="utf-8") as f:
+            json.dump({"rows": table.rows}, f)
+        os.replace(tmp, entry)
+    except OSError:
+        # Another process won the race (entry already exists) or the disk is read-only
+        shutil.rmtree(tmp, ignore_errors=True)
+        if not entry.exists():
+            raise
+
+
+def _read_entry(entry):
+    """Open a cached table; the values array is memory-mapped, not read"""
+    with open(entry / "rows.json", encoding="utf-8") as f:
+        rows = [tuple(row) for row in json.load(f)["rows"]]
+    values = np.load(entry / "values.npy", mmap_mode="r")
+    return CohortTable(rows, values)
+
+
+def _prune(cache_dir, keep):
+    """Remove cache entries for older workbook contents"""
+    for entry in Path(cache_dir).glob("v*-*"):
+        if entry != keep and entry.is_dir():
+            shutil.rmtree(entry, ignore_errors=True)
+
+
+def load_table(path=WORKBOOK_PATH, cache_dir=CACHE_DIR):
+    """Load the cohort table through the content-hashed cache
+
+    The returned table carries a ``load_info`` LoadInfo(hit, seconds, digest, path).
+    """
+    start = time.perf_counter()
+    digest = file_digest(path)
+    entry = cache_entry(digest, cache_dir)
+
+    table = None
+    if entry.is_dir():
+        try:
+            table = _read_entry(entry)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning("Ignoring unreadable cache entry %s: %s", entry, e)
+            shutil.rmtree(entry, ignore_errors=True)
+
+    hit = table is not None
+    if not hit:
+        table = load_workbook(path)
+        _write_entry(table, entry)
+        _prune(cache_dir, keep=entry)
+
+    table.load_info = LoadInfo(hit, time.perf_counter() - start, digest, str(entry))
+    logger.info("Workbook load: %s in %.1f ms (%s)",
+                "cache hit" if hit else "cache miss", table.load_info.seconds * 1000, digest[:12])
+    return table
+
+
+if __name__ == "__main__":
+    for _ in range(2):
+        info = load_table().load_info
+        print(f"{'hit ' if info.hit else 'miss'} {info.seconds * 1000:8.2f} ms  {info.path}")
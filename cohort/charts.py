@@ -0,0 +1,289 @@
+import numpy as np
+
+# Dimension folders shown in the dashboard (same order as CONFIG["filters"])
+DASHBOARD_DIMENSIONS = [
+    "Age group",
+    "Designation",
+    "Gender",
+    "Highest Educational Qualification",
+    "Prior Experience",
+    "Resume Source",
+    "Work Status",
+]
+
+# X-axis label per dimension (defaults to the dimension name)
+XLABELS = {
+    "Age group": "Age Group",
+}
+
+# Dimensions whose charts also show the "Sub total" bar
+SHOW_SUBTOTAL = {"Work Status"}
+
+# Infant attrition: employees who left in the first N months as a share of
+# those who left in the first M months, as (N, M). The dimensions in the
+# second block of the sheet measure against 12 months instead of 23.
+INFANT_ATTRITION_WINDOW = (6, 23)
+INFANT_ATTRITION_WINDOWS = {
+    "Resume Source": (6, 12),
+    "Prior Experience": (6, 12),
+    "Age group": (6, 12),
+}
+
+DATA_AS_OF = "May 29, 2025"
+DPI = 300
+
+# Smaller copies written next to every 300-dpi original (in <dimension>/variants/),
+# downscaled from the same raster so the figure is drawn only once.
+# Either "dpi" (relative to DPI) or "width" (pixels) sets the size.
+VARIANTS = {
+    "preview": {"dpi": 96, "format": "png"},
+    "display": {"dpi": 150, "format": "webp", "lossless": True},
+}
+
+# Chart families rendered for every dimension; the key is the PNG file name
+# expected by streamlit_dashboard.py. Panel metrics refer to cohort.workbook.METRICS.
+CHART_SPECS = {
+    "Plot1 Head Count": {
+        "title": None,
+        "layout": (2, 1),
+        "figsize": (16, 12),
+        "palette": "muted",
+        "tight_layout": {"pad": 3.0, "rect": [0, 0.03, 1, 0.95]},
+        "panels": [
+            {"metric": "Head Count", "cohort": "CAP LRM",
+             "title": "CAP LRM cohort", "ylabel": "Head Count"},
+            {"metric": "Head Count", "cohort": "CAP 12",
+             "title": "CAP 12 cohort", "ylabel": "Head Count"},
+        ],
+    },
+    "Plot2 Performance Indicators KPI Combined": {
+        "title": "Performance Indicators Dashboard",
+        "layout": (2, 2),
+        "figsize": (16, 12),
+        "palette": "viridis",
+        "tight_layout": {"pad": 3.0, "rect": [0, 0.03, 1, 0.95]},
+        "panels": [
+            {"metric": "Average Cumulative Combined KPI Achievement", "cohort": "CAP LRM",
+             "title": "Average Cumulative Combined KPI - performance Achievement % of Cohort LRM",
+             "ylabel": "Values (%)"},
+            {"metric": "CAP on Combined KPI Top 10%", "cohort": "CAP 12",
+             "title": "CAP on COMBINED KPI of Top 10% performers in CAP 12 COHORT",
+             "ylabel": "Values (%)"},
+            {"metric": "CAP on Combined KPI Bottom 10%", "cohort": "CAP 12",
+             "title": "CAP on COMBINED KPI of Bottom 10% performers in CAP 12 COHORT",
+             "ylabel": "Values (%)"},
+            {"metric": "Performance Multiple Combined KPI", "cohort": "CAP 12",
+             "title": "Performance multiple of the CAP 12 cohort",
+             "ylabel": "Ratio"},
+        ],
+    },
+    "Plot3 Performance Indicators KPI 1": {
+        "title": "Performance Indicators Dashboard",
+        "layout": (2, 2),
+        "figsize": (16, 12),
+        "palette": "viridis",
+        "tight_layout": {"pad": 3.0, "rect": [0, 0.03, 1, 0.95]},
+        "panels": [
+            {"metric": "Average Cumulative KPI 1 Achievement", "cohort": "CAP LRM",
+             "title": "Average Cumulative KPI 1 - performance Achievement % of Cohort LRM",
+             "ylabel": "Values (%)"},
+            {"metric": "CAP on KPI 1 Top 10%", "cohort": "CAP 12",
+             "title": "CAP on KPI 1 of Top 10% performers in CAP 12 COHORT",
+             "ylabel": "Values (%)"},
+            {"metric": "CAP on KPI 1 Bottom 10%", "cohort": "CAP 12",
+             "title": "CAP on KPI 1 of Bottom 10% performers in CAP 12 COHORT",
+             "ylabel": "Values (%)"},
+            {"metric": "Performance Multiple KPI 1", "cohort": "CAP 12",
+             "title": "Performance multiple ON KPI 1 of the CAP 12 cohort",
+             "ylabel": "Ratio"},
+        ],
+    },
+    "Plot4 Revenue Indicators": {
+        "title": "Revenue Indicators",
+        "layout": (1, 2),
+        "figsize": (22, 9),
+        "palette": "viridis",
+        "tight_layout": {"pad": 3.0, "rect": [0, 0.03, 1, 0.95]},
+        "panels": [
+            {"metric": "Time to First Sale", "cohort": "CAP LRM",
+             "title": "Time to make the first sale CAP LRM cohort (Months)",
+             "ylabel": "Time (Months)"},
+            {"metric": "CAR2CATPO Ratio up to Residency Month 6", "cohort": "CAP LRM",
+             "title": "CAR2CATPO ratio UP TO Residency month 6 for CAP LRM cohort (Ratio)",
+             "ylabel": "Ratio"},
+        ],
+    },
+    "Plot5 Attrition Indicators": {
+        "title": "Attrition Indicators",
+        "layout": (3, 2),
+        "figsize": (18, 15),
+        "palette": "viridis",
+        # Laid out by matplotlib's constrained layout (instead of tight_layout), which
+        # sizes every panel around its own rotated tick labels; rect leaves room for
+        # the "Data as of" footer
+        "constrained_layout": {"h_pad": 0.2, "w_pad": 0.2, "hspace": 0.08, "wspace": 0.05,
+                               "rect": [0, 0.03, 1, 1]},
+        "title_fontsize": 12,
+        "panels": [
+            {"metric": "Attrited Count", "cohort": "CAP LRM",
+             "title": "Count of attrited employees in Cohort LRM",
+             "ylabel": "Count"},
+            {"metric": "Average Residency", "cohort": "CAP LRM",
+             "title": "Average Residency of all employees in COHORT LRM",
+             "ylabel": "Months"},
+            {"metric": "Average Residency of Top 100 in KPI 1", "cohort": "CAP LRM",
+             "title": "Average Residency of TOP 100 employees in KPI 1 in COHORT LRM",
+             "ylabel": "Months"},
+            {"metric": "Six Month Attrition", "cohort": "CAP LRM",
+             "title": "attrition in the first six residency months as a % of people joined ( Cohort LRM)",
+             "ylabel": "Percentage (%)"},
+            {"metric": "Infant Attrition", "cohort": "CAP LRM",
+             "title": "Infant attrition - attritted employees in the first {infant_first} months as a % of "
+                      "all attritted employees in the first {infant_months} months in the sub cohort",
+             "ylabel": "Percentage (%)"},
+        ],
+    },
+}
+
+# Chart families drawn from employee records rather than the workbook
+# (render_charts.py --employees); one line per category of the dimension.
+EMPLOYEE_CHART_SPECS = {
+    "Plot6 Retention Curves": {
+        "title": "Retention Curves",
+        "kind": "retention",
+        "layout": (1, 1),
+        "figsize": (16, 9),
+        "palette": "viridis",
+        "tight_layout": {"pad": 3.0, "rect": [0, 0.03, 1, 0.95]},
+        # Work Status is the outcome itself (Active stays at 100%, Inactive falls to 0)
+        "skip_dimensions": ["Work Status"],
+        "panels": [
+            {"title": "Share of Cohort LRM still employed by residency month (Kaplan-Meier)",
+             "xlabel": "Residency month", "ylabel": "Retained (%)"},
+        ],
+    },
+    # One heatmap per category: the latest `months` joining months by their
+    # first `months` residency months (cohort.triangle.RetentionTriangle)
+    "Plot7 Retention Triangle": {
+        "title": "Retention Triangle",
+        "kind": "triangle",
+        "layout": None,  # a grid with one panel per category
+        "figsize": (18, 15),
+        "palette": "viridis",
+        "cmap": "YlGnBu",
+        "months": 24,
+        "title_fontsize": 12,
+        "tight_layout": {"pad": 3.0, "rect": [0, 0.03, 1, 0.95]},
+        "skip_dimensions": ["Work Status"],
+        "panels": [
+            {"title": "{category} (n={count:,})",
+             "xlabel": "Months since joining", "ylabel": "Joining month"},
+        ],
+    },
+}
+
+
+def chart_spec(family):
+    """Spec of a workbook or employee chart family"""
+    return CHART_SPECS[family] if family in CHART_SPECS else EMPLOYEE_CHART_SPECS[family]
+
+
+def charted(family, dimension):
+    """Whether a chart family is drawn for a dimension"""
+    return dimension not in chart_spec(family).get("skip_dimensions", ())
+
+
+def infant_window(dimension):
+    """(first, within) months of the infant attrition ratio for a dimension"""
+    return INFANT_ATTRITION_WINDOWS.get(dimension, INFANT_ATTRITION_WINDOW)
+
+
+def chart_slice(table, family, dimension):
+    """Data slice for one chart: categories plus one display-ready value array per panel
+
+    Percentages are scaled from the sheet's fractions to 0-100, and categories
+    without any non-zero value in the chart are dropped (as the scripts did by hand).
+    """
+    spec = CHART_SPECS[family]
+    categories = table.categories(dimension, include_subtotal=dimension in SHOW_SUBTOTAL)
+    columns = []
+    for panel in spec["panels"]:
+        _, values = table.series(dimension, panel["metric"], panel["cohort"],
+                                 include_subtotal=dimension in SHOW_SUBTOTAL)
+        if table.units[(panel["metric"], panel["cohort"])] == "%":
+            values = values * 100
+        columns.append(np.asarray(values, dtype=np.float64))
+
+    first, months = infant_window(dimension)
+    stacked = np.vstack(columns) if columns else np.empty((0, len(categories)))
+    keep = np.any(np.nan_to_num(stacked) != 0, axis=0)
+    return {
+        "dimension": dimension,
+        "xlabel": XLABELS.get(dimension, dimension),
+        "categories": [c for c, k in zip(categories, keep) if k],
+        "values": [column[keep] for column in columns],
+        "titles": [p["title"].format(infant_first=first, infant_months=months)
+                   for p in spec["panels"]],
+        "units": [table.units[(p["metric"], p["cohort"])] for p in spec["panels"]],
+    }
+
+
+def retention_slice(curves, family, dimension):
+    """Data slice of a retention chart: one curve (0-100%) per category of the dimension
+
+    `curves` is the frame of cohort.survival.retention_curves; categories
+    without employees are dropped.
+    """
+    spec = EMPLOYEE_CHART_SPECS[family]
+    block = curves.loc[dimension]
+    block = block[block["joined"] > 0]
+    values = block.drop(columns="joined").to_numpy(dtype=np.float64) * 100
+    return {
+        "dimension": dimension,
+        "xlabel": spec["panels"][0]["xlabel"],
+        "categories": [str(c) for c in block.index],
+        "counts": [int(n) for n in block["joined"]],
+        "values": list(values),
+        "titles": [p["title"] for p in spec["panels"]],
+        "units": ["%"],
+    }
+
+
+def triangle_slice(triangle, family, dimension):
+    """Data slice of a retention triangle chart: one (join month, offset) grid (0-100%) per category"""
+    spec = EMPLOYEE_CHART_SPECS[family]
+    panel = spec["panels"][0]
+    months = spec["months"]
+    joined, _ = triangle.counts(dimension)
+    shares = triangle.shares(dimension)[:, -months:, :months] * 100
+    rows = [str(month) for month in np.arange(triangle.last_month - len(shares[0]) + 1,
+                                              triangle.last_month + 1)]
+    keep = joined.sum(axis=1) > 0
+    categories = [c for c, k in zip(triangle.categories(dimension), keep) if k]
+    counts = [int(n) for n in joined.sum(axis=1)[keep]]
+    return {
+        "dimension": dimension,
+        "xlabel": panel["xlabel"],
+        "categories": categories,
+        "counts": counts,
+        "rows": rows,
+        "values": list(shares[keep]),
+        "titles": [panel["title"].format(category=c, count=n) for c, n in zip(categories, counts)],
+        "units": ["%"] * len(categories),
+    }
+
+
+# Data slice builder per employee chart kind, from the matching employee view
+EMPLOYEE_SLICES = {
+    "retention": retention_slice,
+    "triangle": triangle_slice,
+}
+
+
+def value_label(value, unit):
+    """Bar label text for a display value"""
+    if unit == "Nos":
+        return f"{value:,.0f}"
+    if unit == "%":
+        return f"{value:.0f}%"
+    return f"{value:.2f}"
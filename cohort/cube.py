@@ -0,0 +1,243 @@
+import numpy as np
+
+from .plan import PERFORMER_SHARE, TOP_COUNT, _evaluate, _fused_cells, _ratio
+from .sketch import compact, share_means
+from .topk import GroupTopK
+from .workbook import OVERALL_CATEGORY, SUBTOTAL_CATEGORY, CohortTable
+
+
+def _mixed_radix(codes, sizes):
+    """Single integer key per row of a (rows, dimensions) array of codes in [0, size)"""
+    key = np.zeros(len(codes), dtype=np.int64)
+    for i, size in enumerate(sizes):
+        key = key * size + codes[:, i]
+    return key
+
+
+def _leading(cell, value, n_cells, ids=None, **extra):
+    """Top-count state: the TOP_COUNT highest members of every cell, in ascending value order"""
+    topk = GroupTopK(n_cells, TOP_COUNT).update(cell, value, ids, **extra)
+    items = topk.items()
+    order = np.argsort(items["score"], kind="stable")
+    state = {"cell": items["group"][order], "value": items["score"][order]}
+    state.update({name: items[name][order] for name in extra})
+    return state
+
+
+def _sketched(state, sketch_k, rng):
+    """Compact the share members of cells above `sketch_k` items per weight level"""
+    if sketch_k is None:
+        return state
+    state["cell"], state["value"], state["weight"] = compact(
+        state["cell"], state["value"], state["weight"], sketch_k, rng)
+    return state
+
+
+def _ranked_stats(state, member_group, n_groups, uses, subtotal):
+    """Top/bottom share and top-count means per group (plus the sub total when asked)
+
+    Members are stored in ascending value order, so a stable sort of the small
+    group ids groups them without sorting values again.
+    """
+    known = member_group >= 0
+    group = member_group[known]
+    group = group.astype(np.int16) if n_groups < np.iinfo(np.int16).max else group
+    regroup = np.argsort(group, kind="stable")
+    group = group[regroup].astype(np.intp)
+    counts = np.bincount(group, minlength=n_groups)
+    position = np.arange(len(group)) - (np.cumsum(counts) - counts)[group]
+
+    stats = {}
+    if uses["share"]:
+        # Weighted items: exact members have weight 1, sketched cells more
+        ascending = state["value"][known]
+        weight = state["weight"][known]
+        stats["bottom"], stats["top"] = share_means(group, ascending[regroup], weight[regroup],
+                                                    n_groups, PERFORMER_SHARE)
+        if subtotal:
+            bottom, top = share_means(np.zeros(len(ascending), dtype=np.intp), ascending, weight,
+                                      1, PERFORMER_SHARE)
+            stats["bottom"] = np.append(stats["bottom"], bottom)
+            stats["top"] = np.append(stats["top"], top)
+
+    leaders = position >= (counts - TOP_COUNT)[group]
+    for name in uses["top_count"]:
+        column = state[name][known]
+        means = _ratio(np.bincount(group[leaders], column[regroup][leaders], n_groups),
+                       np.minimum(counts, TOP_COUNT))
+        if subtotal:
+            means = np.append(means, column[-TOP_COUNT:].mean() if len(column) else np.nan)
+        stats[f"top_count:{name}"] = means
+    return stats
+
+
+class CohortCube:
+    """Sparse cube of mergeable aggregates over every combination of dimension categories
+
+    Only occupied cells are stored. Each cell keeps the weighted sums of the
+    metric plan. Ranked metrics keep their members in ascending value order
+    with the cell each belongs to; for top-count metrics only the TOP_COUNT
+    leaders of each cell are kept, which is all any query can need. With
+    `sketch_k` set, the top/bottom share members of large cells are compacted
+    into weighted quantile-sketch items (cohort.sketch); cells with at most
+    `sketch_k` members stay exact. One random generator (`rng`) serves every
+    compaction of the cube and the cubes merged into it, so compaction
+    errors cancel out instead of repeating.
+    """
+
+    def __init__(self, plan, labels, cells, sums, ranked, sketch_k=None, rng=None):
+        self.plan = plan
+        self.sketch_k = sketch_k
+        self.rng = np.random.default_rng(rng)
+        self.dimensions = plan["dimensions"]
+        self.labels = labels  # {dimension: [category, ...]}
+        self.cells = cells  # (n_cells, n_dimensions) category codes, -1 unknown
+        self.sums = sums  # {weight name: (n_cells,) sums}
+        self.ranked = ranked  # {value: {"cell": ..., "value": ..., top-count column: ...}}
+
+    def __repr__(self):
+        members = sum(len(state["cell"]) for state in self.ranked.values())
+        return f"CohortCube({len(self.dimensions)} dimensions, {len(self.cells)} cells, {members} ranked members)"
+
+    def _axis(self, dimension):
+        try:
+            return self.dimensions.index(dimension)
+        except ValueError:
+            raise KeyError(dimension) from None
+
+    def _code(self, dimension, category):
+        try:
+            return self.labels[dimension].index(category)
+        except ValueError:
+            raise KeyError((dimension, category)) from None
+
+    def query(self, by=(), where=None, subtotal=False, keep_empty=False):
+        """Metric values per combination of the `by` categories within the `where` filter
+
+        `where` maps a dimension to a category or a list of categories, e.g.
+        query(by=["Age group"], where={"Resume Source": "Portal"}). Returns
+        (groups, values): groups are tuples of `by` categories, values has one
+        column per plan metric. subtotal=True appends a ("Sub total", ...)
+        row over all groups; keep_empty keeps combinations without employees.
+        """
+        by = list(by)
+        where = where or {}
+        selected = np.ones(len(self.cells), dtype=bool)
+        for dimension, categories in where.items():
+            if isinstance(categories, str):
+                categories = [categories]
+            wanted = [self._code(dimension, category) for category in categories]
+            selected &= np.isin(self.cells[:, self._axis(dimension)], wanted)
+
+        by_codes = self.cells[:, [self._axis(d) for d in by]].astype(np.int64)
+        selected &= (by_codes >= 0).all(axis=1)
+        sizes = [len(self.labels[d]) for d in by]
+        n_groups = int(np.prod(sizes, dtype=np.int64))
+        cell_group = np.full(len(self.cells), -1, dtype=np.int64)
+        cell_group[selected] = _mixed_radix(by_codes[selected], sizes)
+
+        groups = cell_group[selected]
+        sums = {name: np.bincount(groups, cell_sums[selected], n_groups)
+                for name, cell_sums in self.sums.items()}
+        if subtotal:
+            sums = {name: np.append(group_sums, group_sums.sum()) for name, group_sums in sums.items()}
+        ranks = {value: _ranked_stats(state, cell_group[state["cell"]], n_groups,
+                                      self.plan["ranked"][value], subtotal)
+                 for value, state in self.ranked.items()}
+
+        # Infant attrition uses the window of the dimension being broken down
+        window = next(iter(by or where), "Overall")
+        values = _evaluate(self.plan["expressions"][window], sums, ranks)
+
+        if by:
+            positions = np.unravel_index(np.arange(n_groups), sizes)
+            keys = list(zip(*([self.labels[d][code] for code in codes]
+                              for d, codes in zip(by, positions))))
+        else:
+            keys = [()]
+        keep = np.bincount(groups, minlength=n_groups) > 0 if not keep_empty else np.ones(n_groups, bool)
+        if subtotal:
+            keys.append((SUBTOTAL_CATEGORY,) * max(len(by), 1))
+            keep = np.append(keep, True)
+        return [key for key, k in zip(keys, keep) if k], values[keep]
+
+    def table(self):
+        """The sheet layout as a CohortTable: the overall row, then each dimension with its sub total"""
+        rows = [("Overall", OVERALL_CATEGORY)]
+        blocks = [self.query(keep_empty=True)[1]]
+        for dimension in self.dimensions:
+            groups, values = self.query(by=[dimension], subtotal=True, keep_empty=True)
+            rows += [(dimension, category) for category, in groups]
+            blocks.append(values)
+        return CohortTable(rows, np.vstack(blocks))
+
+    def merge(self, other):
+        """Cube over the employees of both cubes (e.g. two partitions of the records)"""
+        if other.dimensions != self.dimensions or other.plan["sums"] != self.plan["sums"]:
+            raise ValueError("Cubes were built from different metric plans")
+        labels, other_cells = {}, []
+        for i, dimension in enumerate(self.dimensions):
+            merged = list(self.labels[dimension])
+            merged += [c for c in other.labels[dimension] if c not in self.labels[dimension]]
+            # The trailing -1 keeps unknown codes unknown
+            remap = np.array([merged.index(c) for c in other.labels[dimension]] + [-1], dtype=np.int16)
+            other_cells.append(remap[other.cells[:, i]])
+            labels[dimension] = merged
+        other_cells = np.column_stack(other_cells) if other_cells else other.cells
+
+        cells = np.vstack([self.cells, other_cells])
+        key = _mixed_radix(cells.astype(np.int64) + 1, [len(labels[d]) + 1 for d in self.dimensions])
+        _, first, inverse = np.unique(key, return_index=True, return_inverse=True)
+        n_cells = len(first)
+        sums = {name: np.bincount(inverse, np.concatenate([self.sums[name], other.sums[name]]), n_cells)
+                for name in self.sums}
+
+        ranked = {}
+        offset = len(self.cells)
+        for value, state in self.ranked.items():
+            theirs = other.ranked[value]
+            merged = {name: np.concatenate([state[name], theirs[name]]) for name in state if name != "cell"}
+            merged["cell"] = np.concatenate([inverse[state["cell"]], inverse[offset + theirs["cell"]]])
+            if self.plan["ranked"][value]["share"]:
+                order = np.argsort(merged["value"], kind="stable")
+                ranked[value] = _sketched({name: column[order] for name, column in merged.items()},
+                                          self.sketch_k, self.rng)
+            else:
+                ranked[value] = _leading(merged.pop("cell"), merged.pop("value"), n_cells, **merged)
+        return CohortCube(self.plan, labels, cells[first], sums, ranked, self.sketch_k, self.rng)
+
+
+def build_cube(plan, n_rows, codes, weight, ranked, sketch_k=None, seed=0):
+    """Build a CohortCube from per-row inputs in one fused pass
+
+    `codes` maps each plan dimension to (integer codes, category labels);
+    `weight(name)` returns a per-row weight column (None for "employees"), and
+    `ranked[value]` gives (member rows, value column, {top-count column name:
+    column}); share members are given in ascending value order. `sketch_k` bounds the top/bottom share state
+    per cell (None keeps every member, i.e. exact results); `seed` starts the
+    cube's random generator, so sketched results are reproducible.
+    """
+    rng = np.random.default_rng(seed)
+    dimensions = plan["dimensions"]
+    key, n_keys, decode = _fused_cells([(codes[d][0], len(codes[d][1])) for d in dimensions], n_rows)
+    occupied = np.flatnonzero(np.bincount(key, minlength=n_keys))
+    sums = {name: np.bincount(key, weight(name), n_keys)[occupied].astype(np.float64)
+            for name in plan["sums"]}
+    cells = np.empty((len(occupied), len(dimensions)), dtype=np.int16)
+    for i in range(len(dimensions)):
+        cells[:, i] = decode(occupied, i)
+
+    cell_of_key = np.full(n_keys, -1, dtype=np.int64)
+    cell_of_key[occupied] = np.arange(len(occupied))
+    row_cell = cell_of_key[key]
+    states = {}
+    for value, (members, column, extra) in ranked.items():
+        if plan["ranked"][value]["share"]:
+            state = {"cell": row_cell[members], "value": column[members],
+                     "weight": np.ones(len(members), dtype=np.int64)}
+            states[value] = _sketched(state, sketch_k, rng)
+        else:
+            # Streaming per-cell heaps instead of a sort of every member
+            states[value] = _leading(row_cell[members], column[members], len(occupied), members,
+                                     **{name: extra_column[members] for name, extra_column in extra.items()})
+    return CohortCube(plan, {d: list(codes[d][1]) for d in dimensions}, cells, sums, states, sketch_k, rng)
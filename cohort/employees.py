@@ -0,0 +1,283 @@
+import numpy as np
+import pandas as pd
+
+from .attrition import exit_months, left_within
+from .bitmap import BitmapIndex
+from .charts import DATA_AS_OF
+from .cube import build_cube
+from .plan import _ratio, compile_plan
+from .survival import RETENTION_HORIZON, retention_curves
+from .triangle import RetentionTriangle
+from .workbook import RANGE_SUFFIX, _range_label
+
+# Employee records are a DataFrame with one row per employee:
+#   joining_date, exit_date      datetime64 (exit_date is NaT while still employed)
+#   designation, education,
+#   gender, resume_source        category labels
+#   age_at_joining               years
+#   prior_experience             months
+#   kpi_combined_cap, kpi1_cap   cumulative achievement (actual / target) over the whole residency
+#   kpi_combined_cap12, kpi1_cap12   the same over residency months 1-12 (see kpi_caps)
+#   first_sale_months            residency months until the first sale (NaN: no sale yet;
+#                                see cohort.ledger.first_sale_months for a sales ledger)
+#   car_m6, catpo_m6             revenue and target summed over residency months 1-6
+#                                (cohort.ledger.residency_window_sums over a RevenueStore)
+
+# Source column per dimension; Work Status is derived from exit_date
+DIMENSION_COLUMNS = {
+    "Work Status": None,
+    "Designation": "designation",
+    "Highest Educational Qualification": "education",
+    "Gender": "gender",
+    "Resume Source": "resume_source",
+    "Prior Experience": "prior_experience",
+    "Age group": "age_at_joining",
+}
+
+WORK_STATUS = ["Active", "Inactive"]
+
+# Categories of the label dimensions in sheet order, which every chart
+# follows; categories missing here come after these, in order of appearance
+SHEET_CATEGORIES = {
+    "Designation": [
+        "Sales Development Manager", "Business Development Manager", "Assistant Sales manager",
+        "Sales Manager", "Sr. Sales manager", "Executive sales manager",
+        "Senior executive sales manager", "Business manager", "Senior business manager",
+        "executive business manager",
+    ],
+    "Highest Educational Qualification": [
+        "Secondary", "Higher Secondary", "Diploma", "Graduation", "Post Graduation",
+        "Professional Degree", "Not Applicabl", "Certification Course",
+    ],
+    "Gender": ["Male", "Female"],
+    "Resume Source": ["Employee Referral", "Portal", "Others", "Not Available", "Vendor"],
+}
+
+# (lower, upper] bins of the numeric dimensions, as in the sheet; the lower
+# bound of the first bin is inclusive
+RANGE_BINS = {
+    "Prior Experience": [(0, 0), (0, 6), (6, 12), (12, 24), (24, 36), (36, 346)],
+    "Age group": [(20, 22), (22, 25), (25, 28), (28, 30), (30, 35), (35, 52)],
+}
+
+# Residency months needed to enter the CAP 12 cohort
+CAP_MONTHS = 12
+
+AVG_MONTH_DAYS = 365.25 / 12
+
+
+def residency_months(joining_date, exit_date, as_of):
+    """Residency in (fractional) months; employees without an exit date count up to `as_of`"""
+    joining = np.asarray(joining_date, dtype="datetime64[D]")
+    end = np.asarray(exit_date, dtype="datetime64[D]")
+    end = np.where(np.isnat(end), np.datetime64(as_of, "D"), end)
+    return (end - joining).astype(np.float64) / AVG_MONTH_DAYS
+
+
+def kpi_caps(monthly, n_employees, cap_months=CAP_MONTHS):
+    """Per-employee cumulative achievement from monthly KPI rows
+
+    `monthly` has one row per employee and residency month: employee (row
+    position in the employee frame), month (1-based residency month) and
+    kpi_combined_target/_actual, kpi1_target/_actual. It may also be an
+    iterable of such chunks, which are reduced one at a time. Returns the
+    four *_cap / *_cap12 columns of the employee frame (cohort.panel.KpiPanel
+    gives the same columns, kept up to date month by month).
+    """
+    if isinstance(monthly, pd.DataFrame):
+        monthly = [monthly]
+    totals = {}
+    for chunk in monthly:
+        employee = chunk["employee"].to_numpy()
+        first = chunk["month"].to_numpy() <= cap_months
+        for kpi in ("kpi_combined", "kpi1"):
+            for part in ("target", "actual"):
+                values = chunk[f"{kpi}_{part}"].to_numpy(dtype=np.float64)
+                for suffix, rows in (("", slice(None)), ("12", first)):
+                    key = (kpi, part, suffix)
+                    sums = np.bincount(employee[rows], values[rows], n_employees)
+                    totals[key] = totals[key] + sums if key in totals else sums
+    empty = np.zeros(n_employees)
+    return {f"{kpi}_cap{suffix}": _ratio(totals.get((kpi, "actual", suffix), empty),
+                                         totals.get((kpi, "target", suffix), empty))
+            for kpi in ("kpi_combined", "kpi1") for suffix in ("", "12")}
+
+
+def dimension_codes(employees, dimension, attrited=None):
+    """Integer category codes (-1: unknown / out of range) and category labels"""
+    if dimension == "Work Status":
+        return attrited.astype(np.int16), list(WORK_STATUS)
+    column = employees[DIMENSION_COLUMNS[dimension]]
+    if dimension in RANGE_BINS:
+        bins = RANGE_BINS[dimension]
+        values = column.to_numpy(dtype=np.float64)
+        codes = np.searchsorted([upper for _, upper in bins], values, side="left")
+        invalid = np.isnan(values) | (values < bins[0][0]) | (codes == len(bins))
+        codes = np.where(invalid, -1, codes).astype(np.int16)
+        suffix = RANGE_SUFFIX.get(dimension, "")
+        return codes, [_range_label(lower, upper, suffix) for lower, upper in bins]
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        # Dictionary-encoded (cohort.encoding): the codes are already there
+        codes, labels = column.cat.codes.to_numpy(), column.cat.categories
+    else:
+        codes, labels = pd.factorize(column, sort=False)
+    return _sheet_order(dimension, codes.astype(np.int16), [str(label) for label in labels])
+
+
+def _sheet_order(dimension, codes, labels):
+    """Codes and labels with the categories put in SHEET_CATEGORIES order"""
+    rank = {label: i for i, label in enumerate(SHEET_CATEGORIES.get(dimension, []))}
+    order = sorted(range(len(labels)), key=lambda i: (rank.get(labels[i], len(rank)), i))
+    if order == list(range(len(labels))):
+        return codes, labels
+    # The trailing -1 keeps unknown codes unknown
+    remap = np.full(len(labels) + 1, -1, dtype=np.int16)
+    remap[order] = np.arange(len(labels))
+    return remap[codes], [labels[i] for i in order]
+
+
+# Ranked values restricted to a cohort (others rank the whole Cohort LRM)
+RANKED_COHORT = {
+    "kpi_combined_cap12": "in_cap12",
+    "kpi1_cap12": "in_cap12",
+}
+
+
+def _prepare(employees, as_of):
+    """Per-employee arrays shared by every metric and dimension"""
+    residency = residency_months(employees["joining_date"].to_numpy(),
+                                 employees["exit_date"].to_numpy(), as_of)
+    months_at_exit = exit_months(employees["joining_date"].to_numpy(),
+                                 employees["exit_date"].to_numpy(), as_of)
+    attrited = months_at_exit >= 0
+    prep = {
+        "residency": residency,
+        "exit_months": months_at_exit,
+        "in_attrited": attrited,
+        "attrited": attrited.astype(np.float64),
+        "in_cap12": residency >= CAP_MONTHS,
+    }
+    prep["cap12"] = prep["in_cap12"].astype(np.float64)
+    for column in ("kpi_combined_cap", "kpi1_cap", "kpi_combined_cap12", "kpi1_cap12",
+                   "first_sale_months", "car_m6", "catpo_m6"):
+        prep[column] = employees[column].to_numpy(dtype=np.float64)
+    return prep
+
+
+def _weight(prep, name):
+    """Per-employee weight column named in a metric plan"""
+    if name == "employees":
+        return None
+    if name not in prep:
+        if name.startswith("attrited_within_"):
+            months = int(name.rsplit("_", 1)[1])
+            prep[name] = left_within(prep["exit_months"], months).astype(np.float64)
+        elif name.endswith("_sum"):
+            # NaN-free sums; the matching "_n" column counts the non-NaN values
+            values = prep[name[:-len("_sum")]]
+            prep[name] = np.where(np.isnan(values), 0.0, values)
+        elif name.endswith("_n"):
+            prep[name] = (~np.isnan(prep[name[:-len("_n")]])).astype(np.float64)
+    return prep[name]
+
+
+def _ranked_inputs(prep, plan):
+    """(member rows, value column, top-count columns) per ranked value of the plan
+
+    Values ranked by top/bottom share are sorted once (ascending); every
+    dimension and query reuses the order. Top-count values are left unsorted
+    for the cube's per-cell heaps.
+    """
+    ranked = {}
+    for value, uses in plan["ranked"].items():
+        values = prep[value]
+        valid = ~np.isnan(values)
+        if value in RANKED_COHORT:
+            valid &= prep[RANKED_COHORT[value]]
+        members = np.flatnonzero(valid)
+        if uses["share"]:
+            members = members[np.argsort(values[members], kind="stable")]
+        ranked[value] = (members, values, {name: prep[name] for name in uses["top_count"]})
+    return ranked
+
+
+def employee_cube(employees, as_of=DATA_AS_OF, dimensions=None, sketch_k=None):
+    """Sparse CohortCube over every combination of the dimensions, built in one fused pass
+
+    `sketch_k` switches the top/bottom 10% CAP state of large cells to quantile
+    sketches (see cohort.sketch.sketch_capacity); None keeps them exact.
+    """
+    as_of = pd.Timestamp(as_of).to_datetime64()
+    prep = _prepare(employees, as_of)
+    dimensions = [d for d in DIMENSION_COLUMNS if dimensions is None or d in dimensions]
+    plan = compile_plan(dimensions)
+    codes = {d: dimension_codes(employees, d, prep["in_attrited"]) for d in dimensions}
+    return build_cube(plan, len(employees), codes, lambda name: _weight(prep, name),
+                      _ranked_inputs(prep, plan), sketch_k)
+
+
+def aggregate_employees(employees, as_of=DATA_AS_OF, dimensions=None, sketch_k=None):
+    """Compute the cohort sheet from employee records as a CohortTable
+
+    Rows follow the sheet: the overall cohort, then every category of each
+    dimension followed by its "Sub total" (employees with a known category).
+    The one-way breakdowns are slices of the employee cube.
+    """
+    return employee_cube(employees, as_of, dimensions, sketch_k).table()
+
+
+def employee_retention(employees, as_of=DATA_AS_OF, dimensions=None, horizon=RETENTION_HORIZON):
+    """Kaplan-Meier retention curves of every category of each dimension (see cohort.survival)
+
+    Work Status is left out: it splits employees by the very exits the curves measure.
+    """
+    as_of = pd.Timestamp(as_of).to_datetime64()
+    joining = employees["joining_date"].to_numpy()
+    exit_date = employees["exit_date"].to_numpy()
+    dimensions = [d for d in DIMENSION_COLUMNS
+                  if d != "Work Status" and (dimensions is None or d in dimensions)]
+    codes = {d: dimension_codes(employees, d) for d in dimensions}
+    return retention_curves(joining, exit_date, codes, as_of, horizon)
+
+
+def _attribute_codes(employees, dimensions):
+    """Codes of the stored dimensions (Work Status is derived from exit_date, so never included)"""
+    return {d: dimension_codes(employees, d) for d in DIMENSION_COLUMNS
+            if DIMENSION_COLUMNS[d] is not None and (dimensions is None or d in dimensions)}
+
+
+def employee_triangle(employees, as_of=DATA_AS_OF, dimensions=None, start=None):
+    """Join-month x residency-month RetentionTriangle, sliceable by every dimension
+
+    Work Status is left out: it splits employees by the very exits the triangle measures.
+    """
+    return RetentionTriangle.build(employees["joining_date"].to_numpy(),
+                                   employees["exit_date"].to_numpy(),
+                                   _attribute_codes(employees, dimensions),
+                                   pd.Timestamp(as_of).to_datetime64(), start)
+
+
+def append_employee_month(triangle, employees, month=None):
+    """Add the joiners and leavers of the next month (or `month`) to a triangle in place
+
+    `employees` may be the whole, updated record set or only the month's rows.
+    """
+    dimensions = [d for d in triangle.labels if d != "Overall"]
+    return triangle.append_month(employees["joining_date"].to_numpy(),
+                                 employees["exit_date"].to_numpy(),
+                                 _attribute_codes(employees, dimensions), month)
+
+
+def employee_bitmaps(employees, as_of=DATA_AS_OF, dimensions=None):
+    """BitmapIndex of the cohorts (Cohort LRM, CAP 12) and every category of each dimension"""
+    as_of = pd.Timestamp(as_of).to_datetime64()
+    joining = employees["joining_date"].to_numpy()
+    exit_date = employees["exit_date"].to_numpy()
+    attrited = exit_months(joining, exit_date, as_of) >= 0
+    cohorts = {
+        "Cohort LRM": np.ones(len(employees), dtype=bool),
+        "CAP 12": residency_months(joining, exit_date, as_of) >= CAP_MONTHS,
+    }
+    dimensions = [d for d in DIMENSION_COLUMNS if dimensions is None or d in dimensions]
+    codes = {d: dimension_codes(employees, d, attrited) for d in dimensions}
+    return BitmapIndex.build(codes, cohorts)
@@ -0,0 +1,120 @@
+import json
+import os
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .cache import CACHE_DIR
+from .employees import DIMENSION_COLUMNS, RANGE_BINS, SHEET_CATEGORIES
+
+# Shared dictionary of the categorical employee columns
+DICTIONARY_PATH = CACHE_DIR.parent / "dictionary" / "categories.json"
+
+# Label columns of the employee frame (Work Status is derived from exit_date,
+# the range dimensions are binned from numbers)
+CATEGORY_COLUMNS = [column for dimension, column in DIMENSION_COLUMNS.items()
+                    if column is not None and dimension not in RANGE_BINS]
+
+DATE_COLUMNS = ["joining_date", "exit_date"]
+
+
+class CategoryDictionary:
+    """Shared, append-only labels of the categorical employee columns
+
+    A label's code never changes once assigned: unseen labels get the next
+    code and bump `version`, so frames encoded under an older version decode
+    under any newer one and integer codes from different loads can be grouped
+    together directly. A new dictionary starts from the sheet's categories
+    (cohort.employees.SHEET_CATEGORIES), so their codes follow sheet order.
+    """
+
+    def __init__(self, labels=None, version=0):
+        if labels is None:
+            labels = {DIMENSION_COLUMNS[dimension]: values for dimension, values in SHEET_CATEGORIES.items()}
+        self.labels = {column: list(values) for column, values in labels.items()}
+        self.version = version
+
+    def __repr__(self):
+        sizes = ", ".join(f"{column}={len(values)}" for column, values in self.labels.items())
+        return f"CategoryDictionary(v{self.version}: {sizes})"
+
+    def update(self, column, values):
+        """Add the unseen labels of `values` (in order of appearance); returns the column's labels"""
+        known = self.labels.setdefault(column, [])
+        seen = set(known)
+        unique = pd.unique(pd.Series(values).dropna().astype(str))
+        new = [label for label in unique if label not in seen]
+        if new:
+            known += new
+            self.version += 1
+        return known
+
+    def encode(self, column, values):
+        """Categorical of `values` over the column's labels, with the smallest integer codes"""
+        labels = self.update(column, values)
+        return pd.Categorical(pd.Series(values).astype("string"), categories=labels)
+
+    @classmethod
+    def load(cls, path=DICTIONARY_PATH):
+        """Saved dictionary, or an empty one when there is none yet"""
+        try:
+            with open(path, encoding="utf-8") as f:
+                saved = json.load(f)
+        except FileNotFoundError:
+            return cls()
+        return cls(saved["labels"], saved["version"])
+
+    def save(self, path=DICTIONARY_PATH):
+        """Write the dictionary atomically"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix=path.name + ".", dir=path.parent)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"version": self.version, "labels": self.labels}, f, indent=1)
+        os.replace(tmp, path)
+        return path
+
+
+def downcast(values):
+    """Smallest lossless integer type for whole numbers, else float32"""
+    values = pd.Series(values)
+    if pd.api.types.is_integer_dtype(values) or (
+            pd.api.types.is_float_dtype(values) and values.notna().all()
+            and np.array_equal(values, np.round(values))):
+        return pd.to_numeric(values, downcast="integer").to_numpy()
+    return values.to_numpy(dtype=np.float32)
+
+
+def encode_employees(employees, dictionary=None):
+    """Compact copy of an employee frame: dictionary-encoded labels and downcast numerics
+
+    Label columns become Categoricals over the shared dictionary (int8
+    codes) and numeric columns the smallest integer type or float32; dates
+    are kept. The dictionary version used is recorded in
+    ``attrs["dictionary_version"]``. Without a `dictionary` the shared one at
+    DICTIONARY_PATH is used, and saved again when new labels were added.
+    """
+    shared = dictionary is None
+    dictionary = CategoryDictionary.load() if shared else dictionary
+    version = dictionary.version
+    columns = {}
+    for column in employees.columns:
+        values = employees[column]
+        if column in CATEGORY_COLUMNS:
+            columns[column] = dictionary.encode(column, values)
+        elif pd.api.types.is_numeric_dtype(values) and column not in DATE_COLUMNS:
+            columns[column] = downcast(values)
+        else:
+            columns[column] = values
+    encoded = pd.DataFrame(columns, index=employees.index)
+    encoded.attrs["dictionary_version"] = dictionary.version
+    if shared and dictionary.version != version:
+        dictionary.save()
+    return encoded
+
+
+def read_employees(path, dictionary=None):
+    """Employee records from CSV, encoded (see encode_employees)"""
+    return encode_employees(pd.read_csv(path, parse_dates=DATE_COLUMNS), dictionary)
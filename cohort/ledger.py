@@ -0,0 +1,185 @@
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .attrition import months_after
+from .employees import AVG_MONTH_DAYS
+
+# A sales ledger has one row per transaction:
+#   employee      employee id (the row position in the employee frame unless ids are given)
+#   sale_date     datetime64
+#   revenue       sale amount (CAR); further numeric columns (e.g. a CATPO target
+#                 ledger's "target") are stored and summed the same way
+# Ledgers run to tens of millions of rows, so they are reduced one chunk at a time.
+
+# Ledger rows read per chunk
+LEDGER_CHUNK_ROWS = 1 << 22
+
+
+def read_ledger(path, columns=("employee", "sale_date"), chunk_rows=LEDGER_CHUNK_ROWS):
+    """Chunks of a CSV sales ledger with only the needed `columns` parsed"""
+    parse_dates = ["sale_date"] if "sale_date" in columns else False
+    return pd.read_csv(path, usecols=list(columns), parse_dates=parse_dates, chunksize=chunk_rows)
+
+
+def employee_positions(ids):
+    """Lookup from ledger employee ids to row positions in the employee frame
+
+    The ids are sorted once; each chunk is then matched with one searchsorted
+    (a merge join of the chunk against the sorted ids). Unknown ids give -1.
+    """
+    ids = np.asarray(ids)
+    order = np.argsort(ids, kind="stable")
+    sorted_ids = ids[order]
+
+    def positions(ledger_ids):
+        ledger_ids = np.asarray(ledger_ids, dtype=sorted_ids.dtype)
+        where = np.minimum(np.searchsorted(sorted_ids, ledger_ids), len(sorted_ids) - 1)
+        return np.where(sorted_ids[where] == ledger_ids, order[where], -1)
+
+    return positions
+
+
+def first_sale_months(ledger, joining_date, ids=None):
+    """Residency months from joining to each employee's first sale (NaN: no sale yet)
+
+    `ledger` is a DataFrame or an iterable of chunks (e.g. read_ledger). Each
+    chunk is sorted by (employee, days since joining) and reduced to the first
+    sale of every employee in it (the head of each employee's run); a running minimum
+    per employee is the only state kept, so memory is bounded by one chunk
+    plus one day per employee. Sales dated before the joining date are ignored.
+    """
+    if isinstance(ledger, pd.DataFrame):
+        ledger = [ledger]
+    joining = np.asarray(joining_date, dtype="datetime64[D]").astype(np.int64)
+    n = len(joining)
+    positions = employee_positions(ids) if ids is not None else None
+    never = np.iinfo(np.int64).max
+    first = np.full(n, never)  # days from joining to the first sale
+    for chunk in ledger:
+        employee = chunk["employee"].to_numpy()
+        employee = positions(employee) if positions else employee.astype(np.int64)
+        sale_date = chunk["sale_date"].to_numpy(dtype="datetime64[D]")
+        valid = (employee >= 0) & (employee < n) & ~np.isnat(sale_date)
+        employee = employee[valid]
+        days = sale_date[valid].astype(np.int64) - joining[employee]
+        after = days >= 0
+        employee, days = employee[after], days[after]
+        if not len(employee):
+            continue
+
+        # One sort of a packed (employee, days) key instead of a two-key lexsort
+        key = np.sort((employee << 32) | days)
+        employee, days = key >> 32, key & 0xFFFFFFFF
+        heads = np.flatnonzero(np.r_[True, employee[1:] != employee[:-1]])
+        first[employee[heads]] = np.minimum(first[employee[heads]], days[heads])
+
+    months = np.full(n, np.nan)
+    sold = first != never
+    months[sold] = first[sold] / AVG_MONTH_DAYS
+    return months
+
+
+class RevenueStore:
+    """Ledger rows partitioned by calendar month of the sale, one .npy file per column
+
+    Layout: <root>/<YYYY-MM>/part-<n>/<column>.npy. Every append writes a new
+    part into each month it touches (atomically, via a temporary folder), so
+    ingesting a chunk never rewrites older data. Reads open only the
+    requested columns of the requested months, memory-mapped.
+    """
+
+    def __init__(self, root):
+        self.root = Path(root)
+
+    def __repr__(self):
+        return f"RevenueStore({str(self.root)!r}, {len(self.months())} months)"
+
+    def months(self):
+        """Months with data, ascending (datetime64[M])"""
+        if not self.root.is_dir():
+            return []
+        return sorted(np.datetime64(path.name, "M") for path in self.root.iterdir()
+                      if path.is_dir() and not path.name.startswith("."))
+
+    def append(self, chunk):
+        """Partition a ledger chunk by sale month and add it to the store"""
+        sale_date = chunk["sale_date"].to_numpy(dtype="datetime64[D]")
+        known = ~np.isnat(sale_date)
+        columns = {name: chunk[name].to_numpy()[known] for name in chunk.columns}
+        columns["sale_date"] = sale_date[known]
+        month = columns["sale_date"].astype("datetime64[M]")
+        # One sort by month; each partition is then a contiguous slice
+        order = np.argsort(month, kind="stable")
+        month = month[order]
+        bounds = np.flatnonzero(np.r_[True, month[1:] != month[:-1], True])
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            rows = order[start:stop]
+            self._write_part(str(month[start]), {name: values[rows] for name, values in columns.items()})
+        return self
+
+    def ingest(self, ledger):
+        """Append every chunk of a ledger (a DataFrame or an iterable of chunks)"""
+        for chunk in [ledger] if isinstance(ledger, pd.DataFrame) else ledger:
+            self.append(chunk)
+        return self
+
+    def _write_part(self, month, columns):
+        folder = self.root / month
+        folder.mkdir(parents=True, exist_ok=True)
+        tmp = Path(tempfile.mkdtemp(prefix=".part.", dir=folder))
+        try:
+            for name, values in columns.items():
+                np.save(tmp / f"{name}.npy", values)
+            # Single writer: the next part number is the number of parts so far
+            os.rename(tmp, folder / f"part-{sum(1 for _ in folder.glob('part-*')):05d}")
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+
+    def read(self, month, columns):
+        """{column: values} of one month (only the requested columns are opened)"""
+        parts = sorted((self.root / str(np.datetime64(month, "M"))).glob("part-*"))
+        if not parts:
+            return {name: np.empty(0) for name in columns}
+        arrays = {name: [np.load(part / f"{name}.npy", mmap_mode="r") for part in parts]
+                  for name in columns}
+        return {name: values[0] if len(values) == 1 else np.concatenate(values)
+                for name, values in arrays.items()}
+
+
+def residency_window_sums(store, joining_date, columns, months=6, ids=None):
+    """Per-employee sums of ledger columns over residency months 1..`months`
+
+    A sale counts when fewer than `months` whole months have passed since
+    joining (cohort.attrition.completed_months), i.e. before the employee's
+    window end (cohort.attrition.months_after), a single comparison per row. Only the month partitions
+    that some employee's window reaches are opened, with only the employee,
+    sale_date and summed columns, e.g. car_m6 = residency_window_sums(
+    store, joining, ["revenue"])["revenue"].
+    """
+    joining = np.asarray(joining_date, dtype="datetime64[D]")
+    n = len(joining)
+    # Sales before this date fall in residency months 1..months
+    window_end = months_after(joining, months)
+    positions = employee_positions(ids) if ids is not None else None
+    sums = {name: np.zeros(n) for name in columns}
+    join_month = joining.astype("datetime64[M]")
+    # Months reached by each employee's window: the joining month and the next `months`
+    window_months = np.unique(join_month[~np.isnat(join_month)])
+    wanted = np.unique(np.concatenate([window_months + k for k in range(months + 1)]))
+    for month in np.intersect1d(wanted, store.months()):
+        part = store.read(month, ["employee", "sale_date", *columns])
+        employee = part["employee"]
+        employee = positions(employee) if positions else employee.astype(np.int64)
+        valid = (employee >= 0) & (employee < n)
+        employee = employee[valid]
+        sale_date = np.asarray(part["sale_date"][valid], dtype="datetime64[D]")
+        inside = (sale_date >= joining[employee]) & (sale_date < window_end[employee])
+        for name in columns:
+            sums[name] += np.bincount(employee[inside], part[name][valid][inside], n)
+    return sums
@@ -0,0 +1,63 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from .charts import DATA_AS_OF, VARIANTS
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+
+def _file_sha256(path):
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def manifest_entries(charts, out_root, variant_path):
+    """One entry per chart file (original and variants) that exists on disk
+
+    `charts` yields (family, dimension, output path) tuples.
+    """
+    out_root = Path(out_root)
+    entries = []
+    for family, dimension, out_path in charts:
+        files = [("original", Path(out_path))]
+        files += [(name, variant_path(out_path, name)) for name in VARIANTS]
+        for variant, path in files:
+            if not path.exists():
+                continue
+            entries.append({
+                "filter": dimension,
+                "metric": family,
+                "variant": variant,
+                "path": path.relative_to(out_root).as_posix(),
+                "size": path.stat().st_size,
+                "sha256": _file_sha256(path),
+                "data_as_of": DATA_AS_OF,
+            })
+    return entries
+
+
+def write_manifest(charts, out_root, variant_path, workbook_digest=None):
+    """Write <out_root>/manifest.json atomically; returns its path"""
+    out_root = Path(out_root)
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "generated": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "data_as_of": DATA_AS_OF,
+        "workbook_sha256": workbook_digest,
+        "charts": manifest_entries(charts, out_root, variant_path),
+    }
+    out_root.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix="manifest.", suffix=".json", dir=out_root)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1)
+    path = out_root / MANIFEST_NAME
+    os.replace(tmp, path)
+    return path
@@ -0,0 +1,166 @@
+import numpy as np
+import pandas as pd
+
+from .employees import CAP_MONTHS
+from .plan import _ratio
+
+KPIS = ("kpi_combined", "kpi1")
+PARTS = ("target", "actual")
+
+
+class KpiPanel:
+    """Dense employees x residency-months panel of cumulative KPI targets and actuals
+
+    One array per KPI and part (kpi_combined / kpi1, target / actual); cell
+    (e, m) holds employee e's running total up to residency month m + 1, and
+    `months[e]` how many residency months employee e has reported. Monthly
+    rows use the kpi_caps layout (employee, 1-based month, kpi_*_target,
+    kpi_*_actual). The next month of an employee is an append: its cell is the
+    previous cell plus the new value, so a month of data costs one write per
+    row instead of a recompute. Rows for an earlier month (corrections) or
+    after a gap update only that employee's later cells.
+    """
+
+    def __init__(self, n_employees=0, n_months=CAP_MONTHS, dtype=np.float32):
+        self.dtype = np.dtype(dtype)
+        self.n_employees = n_employees
+        self.n_months = n_months
+        # Arrays may hold spare capacity beyond n_employees x n_months
+        self._months = np.zeros(n_employees, dtype=np.int16)
+        self._totals = {(kpi, part): np.zeros((n_employees, n_months), dtype=self.dtype)
+                        for kpi in KPIS for part in PARTS}
+
+    def __repr__(self):
+        return f"KpiPanel({self.n_employees} employees, {self.n_months} months, {self.dtype})"
+
+    def __len__(self):
+        return self.n_employees
+
+    @property
+    def months(self):
+        """Residency months reported per employee"""
+        return self._months[:self.n_employees]
+
+    @property
+    def totals(self):
+        """{(kpi, part): (employees, months) running totals}"""
+        return {key: values[:self.n_employees, :self.n_months] for key, values in self._totals.items()}
+
+    def nbytes(self):
+        return sum(values.nbytes for values in self._totals.values()) + self._months.nbytes
+
+    def _grow(self, n_employees, n_months):
+        """Room for at least n_employees x n_months, doubling so appends stay amortized"""
+        self.n_employees = max(self.n_employees, n_employees)
+        self.n_months = max(self.n_months, n_months)
+        rows, columns = self._totals[(KPIS[0], PARTS[0])].shape
+        if n_employees <= rows and n_months <= columns:
+            return
+        rows = rows if n_employees <= rows else max(n_employees, 2 * rows)
+        columns = columns if n_months <= columns else max(n_months, 2 * columns)
+        for key, values in self._totals.items():
+            grown = np.zeros((rows, columns), dtype=self.dtype)
+            grown[:len(values), :values.shape[1]] = values
+            self._totals[key] = grown
+        self._months = np.pad(self._months, (0, rows - len(self._months)))
+
+    def add(self, monthly):
+        """Add monthly KPI rows (a DataFrame or an iterable of chunks) in place
+
+        Typically the rows of one new month; a whole history is loaded the same way.
+        """
+        if isinstance(monthly, pd.DataFrame):
+            monthly = [monthly]
+        for chunk in monthly:
+            employee = chunk["employee"].to_numpy().astype(np.int64)
+            column = chunk["month"].to_numpy().astype(np.int64) - 1
+            values = {key: chunk[f"{key[0]}_{key[1]}"].to_numpy(dtype=np.float64) for key in self._totals}
+            # Month by month in ascending order, so a history loads as a run of appends
+            order = np.argsort(column, kind="stable")
+            bounds = np.flatnonzero(np.r_[True, np.diff(column[order]) != 0, True]) if len(order) else []
+            for start, stop in zip(bounds[:-1], bounds[1:]):
+                rows = order[start:stop]
+                self._add(employee[rows], column[rows], {key: v[rows] for key, v in values.items()})
+        return self
+
+    def _add(self, employee, column, values):
+        self._grow(int(employee.max()) + 1, int(column.max()) + 1)
+        # One value per (employee, month): repeated rows are summed first
+        n = self.n_months
+        cells, inverse = np.unique(employee * n + column, return_inverse=True)
+        employee, column = cells // n, cells % n
+        values = {key: np.bincount(inverse, v, len(cells)) for key, v in values.items()}
+
+        reported = self._months[employee].astype(np.int64)
+        # Plain appends: the employee's next month (rows in `cells` are unique)
+        append = column == reported
+        e, c = employee[append], column[append]
+        for key, totals in self._totals.items():
+            previous = np.where(c > 0, totals[e, np.maximum(c - 1, 0)], 0)
+            totals[e, c] = previous + values[key][append]
+        self._months[e] = c + 1
+
+        # Corrections and gaps: rebuild only the touched employees' later cells
+        if not append.all():
+            self._update(employee[~append], column[~append],
+                         {key: v[~append] for key, v in values.items()})
+
+    def _update(self, employee, column, values):
+        touched, inverse = np.unique(employee, return_inverse=True)
+        reported = self._months[touched].astype(np.int64)
+        newest = np.zeros(len(touched), dtype=np.int64)
+        np.maximum.at(newest, inverse, column + 1)
+        ends = np.maximum(reported, newest)
+        columns = np.arange(self._totals[(KPIS[0], PARTS[0])].shape[1])
+        rows = np.arange(len(touched))
+        for key, totals in self._totals.items():
+            block = totals[touched].astype(np.float64)
+            # Carry each running total across any gap up to the new last month
+            carried = np.where(reported > 0, block[rows, np.maximum(reported - 1, 0)], 0.0)
+            gap = (columns >= reported[:, None]) & (columns < ends[:, None])
+            block = np.where(gap, carried[:, None], block)
+            # Each value raises its own month and every later reported month
+            added = np.zeros_like(block)
+            np.add.at(added, (inverse, column), values[key])
+            block += np.cumsum(added, axis=1) * (columns < ends[:, None])
+            totals[touched] = block
+        self._months[touched] = ends
+
+    def cumulative(self, kpi):
+        """(employees, months) cumulative achievement (actual / target); NaN past an employee's months"""
+        totals = self.totals
+        reached = np.arange(self.n_months) < self.months[:, None]
+        ratio = _ratio(totals[(kpi, "actual")], totals[(kpi, "target")])
+        return np.where(reached, ratio, np.nan)
+
+    def caps(self, cap_months=CAP_MONTHS):
+        """The four *_cap / *_cap12 columns of the employee frame (as kpi_caps returns them)"""
+        months = self.months
+        rows = np.arange(len(months))
+        last = np.maximum(months.astype(np.int64) - 1, 0)
+        capped = np.minimum(last, cap_months - 1)
+        caps = {}
+        for kpi in KPIS:
+            for suffix, column in (("", last), ("12", capped)):
+                actual = np.where(months > 0, self._totals[(kpi, "actual")][rows, column], 0)
+                target = np.where(months > 0, self._totals[(kpi, "target")][rows, column], 0)
+                caps[f"{kpi}_cap{suffix}"] = _ratio(actual, target)
+        return caps
+
+    def by_category(self, kpi, codes, labels):
+        """Mean cumulative achievement per category and residency month
+
+        Returns a DataFrame (category x residency month 1..n) over the
+        employees that reached each month; one bincount over the flattened
+        panel covers every category and month.
+        """
+        ratio = self.cumulative(kpi)
+        codes = np.asarray(codes, dtype=np.int64)
+        n_months = self.n_months
+        known = (codes >= 0)[:, None] & ~np.isnan(ratio)
+        cell = (codes[:, None] * n_months + np.arange(n_months))[known]
+        size = len(labels) * n_months
+        sums = np.bincount(cell, ratio[known], size).reshape(len(labels), n_months)
+        counts = np.bincount(cell, minlength=size).reshape(len(labels), n_months)
+        return pd.DataFrame(_ratio(sums, counts), index=pd.Index(labels, name="category"),
+                            columns=pd.RangeIndex(1, n_months + 1, name="month"))
@@ -0,0 +1,132 @@
+import numpy as np
+
+from .charts import infant_window
+from .workbook import METRICS
+
+# Share of the ranked members counted as top / bottom performers
+PERFORMER_SHARE = 0.10
+# Members averaged by "top_count" ("Average Residency of TOP 100 employees in KPI 1")
+TOP_COUNT = 100
+
+# Every sheet metric as an expression over per-group partial results:
+#   ("sum", w)              sum of weight column w ("employees" counts rows)
+#   ("ratio", num, den)     sum(num) / sum(den)
+#   ("top", v)              mean of v over the top PERFORMER_SHARE of the members ranked by v
+#   ("bottom", v)           the same over the bottom share
+#   ("multiple", v)         top / bottom
+#   ("top_count", v, w)     mean of w over the TOP_COUNT members ranked highest by v
+# "{infant_first}" / "{infant_months}" are replaced by the dimension's infant
+# attrition window (cohort.charts.infant_window).
+METRIC_PLAN = {
+    ("Head Count", "CAP LRM"): ("sum", "employees"),
+    ("Head Count", "CAP 12"): ("sum", "cap12"),
+    ("Average Cumulative Combined KPI Achievement", "CAP LRM"):
+        ("ratio", "kpi_combined_cap_sum", "kpi_combined_cap_n"),
+    ("CAP on Combined KPI Top 10%", "CAP 12"): ("top", "kpi_combined_cap12"),
+    ("CAP on Combined KPI Bottom 10%", "CAP 12"): ("bottom", "kpi_combined_cap12"),
+    ("Performance Multiple Combined KPI", "CAP 12"): ("multiple", "kpi_combined_cap12"),
+    ("Average Cumulative KPI 1 Achievement", "CAP LRM"): ("ratio", "kpi1_cap_sum", "kpi1_cap_n"),
+    ("CAP on KPI 1 Top 10%", "CAP 12"): ("top", "kpi1_cap12"),
+    ("CAP on KPI 1 Bottom 10%", "CAP 12"): ("bottom", "kpi1_cap12"),
+    ("Performance Multiple KPI 1", "CAP 12"): ("multiple", "kpi1_cap12"),
+    ("Time to First Sale", "CAP LRM"): ("ratio", "first_sale_months_sum", "first_sale_months_n"),
+    ("CAR2CATPO Ratio up to Residency Month 6", "CAP LRM"): ("ratio", "car_m6_sum", "catpo_m6_sum"),
+    ("Attrited Count", "CAP LRM"): ("sum", "attrited"),
+    ("Average Residency", "CAP LRM"): ("ratio", "residency_sum", "residency_n"),
+    ("Average Residency of Top 100 in KPI 1", "CAP LRM"): ("top_count", "kpi1_cap", "residency"),
+    ("Six Month Attrition", "CAP LRM"): ("ratio", "attrited_within_6", "employees"),
+    ("Infant Attrition", "CAP LRM"):
+        ("ratio", "attrited_within_{infant_first}", "attrited_within_{infant_months}"),
+}
+
+# Above this many possible cells the fused key is compacted with np.unique
+MAX_DENSE_CELLS = 1 << 22
+
+
+def _ratio(num, den):
+    """num / den with NaN where the denominator is zero"""
+    num = np.asarray(num, dtype=np.float64)
+    den = np.asarray(den, dtype=np.float64)
+    out = np.full(np.broadcast(num, den).shape, np.nan)
+    np.divide(num, den, out=out, where=den != 0)
+    return out
+
+
+def compile_plan(dimensions, infant_windows=None, metrics=None):
+    """Resolve the metric expressions of every dimension and collect their shared inputs
+
+    The plan lists each weight column to be summed and each ranked value
+    once, however many metrics and dimensions use it.
+    """
+    infant_windows = infant_windows or {}
+    metrics = metrics or [(metric, cohort) for _, metric, cohort, _ in METRICS]
+    expressions, sums, ranked = {}, set(), {}
+    for dimension in ["Overall", *dimensions]:
+        first, months = infant_windows.get(dimension) or infant_window(dimension)
+        resolved = []
+        for key in metrics:
+            op, *args = METRIC_PLAN[key]
+            args = tuple(arg.format(infant_first=first, infant_months=months) for arg in args)
+            resolved.append((op, args))
+            if op in ("sum", "ratio"):
+                sums.update(args)
+                continue
+            uses = ranked.setdefault(args[0], {"share": False, "top_count": set()})
+            if op == "top_count":
+                uses["top_count"].add(args[1])
+            else:
+                uses["share"] = True
+        expressions[dimension] = resolved
+    return {
+        "dimensions": list(dimensions),
+        "metrics": metrics,
+        "expressions": expressions,
+        "sums": sorted(sums),
+        # {value: {"share": top/bottom share needed, "top_count": [averaged columns]}}
+        "ranked": {value: {"share": uses["share"], "top_count": sorted(uses["top_count"])}
+                   for value, uses in sorted(ranked.items())},
+    }
+
+
+def _fused_cells(codes, n_rows):
+    """One cell id per row for the combination of all dimension codes
+
+    Returns (cell of each row, number of cells, decode) where decode(cells, i)
+    gives the code of dimension i for each cell (-1 for unknown).
+    """
+    radix = [n + 1 for _, n in codes]
+    strides = np.cumprod([1, *radix[:0:-1]])[::-1]
+    key = np.zeros(n_rows, dtype=np.int64)
+    for (dim_codes, _), stride in zip(codes, strides):
+        key += (dim_codes.astype(np.int64) + 1) * stride
+    n_cells = int(np.prod(radix, dtype=np.int64))
+    if n_cells <= MAX_DENSE_CELLS:
+        cell_keys = None
+    else:
+        cell_keys, key = np.unique(key, return_inverse=True)
+        n_cells = len(cell_keys)
+
+    def decode(cells, i):
+        keys = cells if cell_keys is None else cell_keys[cells]
+        return (keys // strides[i]) % radix[i] - 1
+
+    return key, n_cells, decode
+
+
+def _evaluate(expressions, sums, ranks):
+    """Columns of metric values for one block of groups"""
+    columns = []
+    for op, args in expressions:
+        if op == "sum":
+            columns.append(sums[args[0]])
+        elif op == "ratio":
+            columns.append(_ratio(sums[args[0]], sums[args[1]]))
+        elif op in ("top", "bottom"):
+            columns.append(ranks[args[0]][op])
+        elif op == "multiple":
+            columns.append(_ratio(ranks[args[0]]["top"], ranks[args[0]]["bottom"]))
+        elif op == "top_count":
+            columns.append(ranks[args[0]][f"top_count:{args[1]}"])
+        else:
+            raise ValueError(f"Unknown metric op {op!r}")
+    return np.column_stack(columns)
@@ -0,0 +1,371 @@
+import io
+import os
+import textwrap
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+
+import matplotlib
+matplotlib.use("Agg")  # Headless rendering; charts are only ever written to disk
+import numpy as np
+import seaborn as sns
+from matplotlib import patheffects
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from PIL import Image
+
+from .cache import load_table
+from .manifest import write_manifest
+from .render_cache import RenderCache, render_key
+from .charts import (
+    CHART_SPECS, DASHBOARD_DIMENSIONS, DATA_AS_OF, DPI, EMPLOYEE_CHART_SPECS, EMPLOYEE_SLICES,
+    VARIANTS, chart_slice, chart_spec, charted, value_label,
+)
+
+# PNGs are written into the dimension folders at the repository root
+OUTPUT_ROOT = Path(__file__).resolve().parent.parent
+
+
+# Global style settings; part of the render cache key
+STYLE = {
+    "theme": "whitegrid",
+    "font.family": "sans-serif",
+    "data_as_of": DATA_AS_OF,
+}
+
+
+def apply_style():
+    """Seaborn theme shared by every chart (set once per process, before any rendering)"""
+    sns.set_theme(style=STYLE["theme"])
+    matplotlib.rcParams['font.family'] = STYLE["font.family"]
+
+
+def chart_path(out_root, dimension, family):
+    """Output path of a chart, matching get_image_path() in the dashboard"""
+    return Path(out_root) / dimension / f"{family}.png"
+
+
+def variant_path(out_path, name, variant=None):
+    """Path of a smaller variant of a chart, e.g. Gender/variants/Plot1 Head Count.preview.png"""
+    out_path = Path(out_path)
+    variant = variant or VARIANTS[name]
+    return out_path.parent / "variants" / f"{out_path.stem}.{name}.{variant['format']}"
+
+
+def write_variants(png_bytes, out_path, dpi=DPI, variants=None):
+    """Downscale the full-resolution raster into every variant; returns the written paths
+
+    Variants are produced largest first, each resized from the previous one,
+    so only the first resize touches the full 300-dpi raster.
+    """
+    variants = VARIANTS if variants is None else variants
+    if not variants:
+        return []
+    with Image.open(io.BytesIO(png_bytes)) as original:
+        # Chart backgrounds are opaque; dropping alpha makes resizing and encoding cheaper
+        source = original.convert("RGB")
+
+    sizes = {}
+    for name, variant in variants.items():
+        if "width" in variant:
+            scale = min(variant["width"] / source.width, 1.0)
+        else:
+            scale = min(variant["dpi"] / dpi, 1.0)
+        sizes[name] = (max(round(source.width * scale), 1), max(round(source.height * scale), 1))
+
+    written = []
+    for name in sorted(variants, key=lambda n: sizes[n], reverse=True):
+        variant = variants[name]
+        if sizes[name] != source.size:
+            source = source.resize(sizes[name], Image.LANCZOS, reducing_gap=3.0)
+
+        path = variant_path(out_path, name, variant)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if variant["format"] == "webp":
+            source.save(path, format="WEBP", lossless=variant.get("lossless", False),
+                        quality=variant.get("quality", 80), method=4)
+        else:
+            source.save(path, format=variant["format"].upper())
+        written.append(path)
+    return written
+
+
+def draw_bar_panel(ax, categories, values, unit, title, xlabel, ylabel, palette, title_fontsize=14):
+    """One bar subplot drawn straight from a NumPy array, with value labels above the bars
+
+    Precomputed values go directly to ax.bar (no DataFrame or seaborn
+    estimation); NaN bars are masked out and all labels of the panel are
+    placed with a single bar_label call.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    positions = np.arange(len(categories))
+    valid = ~np.isnan(values)
+    colors = np.asarray(palette)[:len(categories)]
+
+    bars = ax.bar(positions[valid], values[valid], width=0.8, color=colors[valid])
+    ax.bar_label(bars, labels=[value_label(v, unit) for v in values[valid]],
+                 padding=3, fontweight='bold', fontsize=10)
+
+    ax.set_xlabel(xlabel, fontsize=12, fontweight='bold')
+    ax.set_ylabel(ylabel, fontsize=12, fontweight='bold')
+    ax.set_title(textwrap.fill(title, 60), fontsize=title_fontsize, fontweight='bold')
+
+    # Set y-axis limit to make sure the text is visible
+    max_value = values[valid].max() if valid.any() else 0
+    ax.set_ylim(0, max_value * 1.2 if max_value > 0 else 1)
+
+    # Categorical x axis as seaborn draws it: no vertical grid, half a bar of margin
+    ax.set_xlim(-0.5, len(categories) - 0.5)
+    ax.xaxis.grid(False)
+    ax.set_xticks(positions)
+    # Long category names (designations, qualifications) need rotated ticks
+    if any(len(c) > 12 for c in categories):
+        ax.set_xticklabels(categories, rotation=45, horizontalalignment='right', fontsize=9)
+    else:
+        ax.set_xticklabels(categories)
+
+    sns.despine(left=True, ax=ax)  # Remove the left spine for cleaner look
+
+
+def draw_retention_panel(ax, categories, counts, curves, title, xlabel, ylabel, palette,
+                         title_fontsize=14):
+    """One line per category: % still employed after each residency month (step curves)"""
+    for category, count, curve, color in zip(categories, counts, curves, palette):
+        months = np.arange(len(curve))
+        ax.step(months, curve, where="post", color=color, linewidth=2.5,
+                label=f"{category} (n={count:,})")
+
+    horizon = max((len(curve) for curve in curves), default=1) - 1
+    ax.set_xlim(0, max(horizon, 1))
+    ax.set_xticks(np.arange(0, horizon + 1, 3))
+    ax.set_ylim(0, 105)
+    ax.set_xlabel(xlabel, fontsize=12, fontweight='bold')
+    ax.set_ylabel(ylabel, fontsize=12, fontweight='bold')
+    ax.set_title(textwrap.fill(title, 80), fontsize=title_fontsize, fontweight='bold')
+    ax.legend(loc="upper right", fontsize=10, frameon=True)
+    sns.despine(left=True, ax=ax)
+
+
+def draw_triangle_panel(ax, rows, values, title, xlabel, ylabel, cmap, title_fontsize=14):
+    """One retention triangle as a heatmap (rows: joining months, columns: months since joining)"""
+    values = np.ma.masked_invalid(np.asarray(values, dtype=np.float64))
+    image = ax.imshow(values, aspect="auto", cmap=cmap, vmin=0, vmax=100, interpolation="nearest")
+    ax.set_xticks(np.arange(0, values.shape[1], 3))
+    ax.set_yticks(np.arange(0, len(rows), 3))
+    ax.set_yticklabels(rows[::3], fontsize=9)
+    ax.set_xlabel(xlabel, fontsize=12, fontweight='bold')
+    ax.set_ylabel(ylabel, fontsize=12, fontweight='bold')
+    ax.set_title(textwrap.fill(title, 60), fontsize=title_fontsize, fontweight='bold')
+    ax.grid(False)
+    return image
+
+
+def _grid(n_panels):
+    """(rows, columns) of a near-square subplot grid, at most three columns wide"""
+    columns = min(n_panels, 3) or 1
+    return -(-n_panels // columns) or 1, columns
+
+
+def panel_count(spec, data):
+    """Panels a chart draws: one per category for triangle charts, else one per spec panel"""
+    return len(data["values"]) if spec.get("kind") == "triangle" else len(spec["panels"])
+
+
+def build_figure(spec, data):
+    """Build the figure of one chart spec with its data slice (before layout)
+
+    Uses a standalone Figure on its own Agg canvas instead of pyplot, so no
+    global figure state is touched and several charts can render at once in
+    different threads. The figure is freed as soon as it goes out of scope.
+    """
+    fig = Figure(figsize=spec["figsize"])
+    FigureCanvasAgg(fig)
+    if "constrained_layout" in spec:
+        fig.set_layout_engine("constrained", **spec["constrained_layout"])
+    # Triangle charts draw one panel per category
+    n_panels = panel_count(spec, data)
+    axes = fig.subplots(*(spec["layout"] or _grid(n_panels)))
+    axes = np.atleast_1d(axes).ravel()
+    for ax in axes[n_panels:]:
+        fig.delaxes(ax)  # e.g. the unused 6th subplot of the 3x2 attrition grid
+
+    # seaborn's barplot draws with saturation=0.75; keep that look
+    palette = [sns.desaturate(color, 0.75)
+               for color in sns.color_palette(spec["palette"], max(len(data["categories"]), 1))]
+    if spec.get("kind") == "retention":
+        draw_retention_panel(axes[0], data["categories"], data["counts"], data["values"],
+                             data["titles"][0], data["xlabel"], spec["panels"][0]["ylabel"],
+                             palette, spec.get("title_fontsize", 14))
+    elif spec.get("kind") == "triangle":
+        panel = spec["panels"][0]
+        for ax, values, title in zip(axes, data["values"], data["titles"]):
+            image = draw_triangle_panel(ax, data["rows"], values, title, data["xlabel"],
+                                        panel["ylabel"], spec["cmap"], spec.get("title_fontsize", 14))
+            # Per panel, as seaborn heatmaps do; the colorbar slot stays in the grid for tight_layout
+            fig.colorbar(image, ax=ax, fraction=0.046, pad=0.02).set_label("Still employed (%)")
+    else:
+        for ax, panel, values, unit, title in zip(axes, spec["panels"], data["values"],
+                                                  data["units"], data["titles"]):
+            draw_bar_panel(ax, data["categories"], values, unit, title, data["xlabel"],
+                           panel["ylabel"], palette, spec.get("title_fontsize", 14))
+
+    if spec.get("title"):
+        # The constrained layout only makes room for a suptitle it positions itself
+        position = {} if "constrained_layout" in spec else {"y": 0.98}
+        title = fig.suptitle(spec["title"], fontsize=24, fontweight='bold',
+                             color='darkblue', alpha=0.8, **position)
+        title.set_path_effects([patheffects.withStroke(linewidth=3, foreground='skyblue')])
+
+    fig.text(0.5, 0.01, f'Data as of {STYLE["data_as_of"]}', ha='center', fontsize=10, fontstyle='italic')
+    return fig
+
+
+def layout_figure(fig, spec):
+    """Lay out a built figure: the spec's constrained layout, else tight_layout"""
+    if "constrained_layout" in spec:
+        fig.get_layout_engine().execute(fig)
+    else:
+        fig.tight_layout(**spec["tight_layout"])
+
+
+def render_chart(spec, data, out_path, dpi=DPI):
+    """Render one chart spec with its data slice and save it as PNG"""
+    fig = build_figure(spec, data)
+    layout_figure(fig, spec)
+    out_path = Path(out_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', dpi=dpi, bbox_inches='tight')
+    out_path.write_bytes(buffer.getvalue())
+    write_variants(buffer.getvalue(), out_path, dpi)
+    return out_path
+
+
+def chart_jobs(table, out_root=OUTPUT_ROOT, dimensions=None, families=None, views=None):
+    """(family, dimension, data slice, output path) for every chart to render
+
+    Employee chart families are drawn from `views`, keyed by the spec's kind:
+    {"retention": cohort.survival.retention_curves frame, "triangle":
+    cohort.triangle.RetentionTriangle}. Families without their view,
+    dimensions a view does not cover and dimensions in a spec's
+    "skip_dimensions" are skipped.
+    """
+    views = views or {}
+    if families is None:
+        families = list(CHART_SPECS) + [family for family, spec in EMPLOYEE_CHART_SPECS.items()
+                                        if spec["kind"] in views]
+    jobs = []
+    for dimension in dimensions or DASHBOARD_DIMENSIONS:
+        for family in families:
+            if not charted(family, dimension):
+                continue
+            if family in CHART_SPECS:
+                data = chart_slice(table, family, dimension)
+            else:
+                kind = EMPLOYEE_CHART_SPECS[family]["kind"]
+                if kind not in views:
+                    continue
+                try:
+                    data = EMPLOYEE_SLICES[kind](views[kind], family, dimension)
+                except KeyError:
+                    continue
+            jobs.append((family, dimension, data, chart_path(out_root, dimension, family)))
+    return jobs
+
+
+def _render_job(job, dpi=DPI):
+    """Render one (family, dimension, data, out_path) job; returns (out_path, seconds)"""
+    family, _, data, out_path = job
+    start = time.perf_counter()
+    render_chart(chart_spec(family), data, out_path, dpi)
+    return out_path, time.perf_counter() - start
+
+
+def _render_job_at(args):
+    return _render_job(*args)
+
+
+def resolve_workers(workers):
+    """Worker/thread count: None/1 renders serially, 0 or negative means one per CPU"""
+    if workers is None:
+        return 1
+    if workers <= 0:
+        return os.cpu_count() or 1
+    return workers
+
+
+def render_all(table=None, out_root=OUTPUT_ROOT, dimensions=None, families=None, dpi=DPI,
+               workers=None, threads=None, cache=True, views=None, force=False):
+    """Render every dimension x family chart; returns the written paths
+
+    With more than one worker the jobs are spread over a process pool. Each
+    worker imports matplotlib once and applies the same style, so the PNGs
+    are byte-identical to a serial run. With ``threads`` instead, charts render
+    concurrently in this process (overlapping PNG encoding and file I/O).
+
+    With ``cache`` enabled, a chart whose render key (data slice, spec, style,
+    library versions) matches the key of the PNG already on disk is skipped.
+    ``force`` re-renders every chart but still records the new keys, so the
+    index keeps matching the PNGs on disk.
+    Afterwards <out_root>/manifest.json is rewritten for the dashboard.
+
+    ``views`` (employee record views, see chart_jobs) adds the employee chart
+    families (Plot6 Retention Curves, Plot7 Retention Triangle).
+    """
+    if table is None:
+        table = load_table()
+    jobs = chart_jobs(table, out_root, dimensions, families, views)
+
+    render_cache = RenderCache(force=force) if cache else None
+    keys = {}
+    if render_cache is not None:
+        style = dict(STYLE, dpi=dpi, variants=VARIANTS)
+        pending = []
+        for job in jobs:
+            family, _, data, out_path = job
+            key = render_key(chart_spec(family), data, style)
+            variants = [variant_path(out_path, name) for name in VARIANTS]
+            if not render_cache.is_fresh(out_path, key, variants):
+                keys[str(out_path)] = key
+                pending.append(job)
+        jobs = pending
+
+    written = []
+    try:
+        for out_path, seconds in _run_jobs(jobs, dpi, workers, threads):
+            written.append(out_path)
+            print(f"{seconds:6.2f}s  {out_path}")
+            if render_cache is not None:
+                render_cache.record(out_path, keys[str(out_path)])
+    finally:
+        if render_cache is not None:
+            render_cache.save()
+            print(render_cache.summary())
+
+    # The manifest always lists every dashboard chart on disk, not just this run's
+    charts = [(family, dimension, chart_path(out_root, dimension, family))
+              for dimension in DASHBOARD_DIMENSIONS
+              for family in [*CHART_SPECS, *EMPLOYEE_CHART_SPECS] if charted(family, dimension)]
+    load_info = getattr(table, "load_info", None)
+    write_manifest(charts, out_root, variant_path, load_info.digest if load_info else None)
+    return written
+
+
+def _run_jobs(jobs, dpi, workers, threads):
+    """Yield (out_path, seconds) as jobs finish, serially, in threads or in a process pool"""
+    workers = min(resolve_workers(workers), len(jobs))
+    threads = min(resolve_workers(threads), len(jobs))
+    if workers <= 1:
+        apply_style()
+        if threads <= 1:
+            for job in jobs:
+                yield _render_job(job, dpi)
+        else:
+            with ThreadPoolExecutor(max_workers=threads) as pool:
+                yield from pool.map(_render_job_at, [(job, dpi) for job in jobs])
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=apply_style) as pool:
+        # Largest figures first so the pool does not end on a long straggler
+        jobs = sorted(jobs, key=lambda job: -panel_count(chart_spec(job[0]), job[2]))
+        yield from pool.map(_render_job_at, [(job, dpi) for job in jobs])
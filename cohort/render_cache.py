@@ -0,0 +1,94 @@
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from .cache import CACHE_DIR
+
+# One index for all charts: {output path: render key}
+RENDER_INDEX = CACHE_DIR.parent / "render" / "index.json"
+
+# Bump when the renderer changes in a way the key cannot see (e.g. drawing code)
+RENDERER_VERSION = 2
+
+# Libraries whose upgrades can change the rasterized output (PIL encodes the variants)
+_VERSIONED_LIBRARIES = ("matplotlib", "seaborn", "numpy", "pandas", "PIL")
+
+
+def library_versions():
+    """Installed versions of the libraries that affect chart pixels"""
+    versions = {}
+    for name in _VERSIONED_LIBRARIES:
+        try:
+            versions[name] = __import__(name).__version__
+        except ImportError:
+            versions[name] = None
+    return versions
+
+
+def render_key(spec, data, style):
+    """Content hash of everything that determines a chart's PNG bytes"""
+    payload = {
+        "renderer": RENDERER_VERSION,
+        "spec": spec,
+        "data": {
+            "categories": data["categories"],
+            "values": [np.asarray(values, dtype=np.float64).ravel().tolist() for values in data["values"]],
+            "units": data["units"],
+            "titles": data["titles"],
+            "xlabel": data["xlabel"],
+            # Only the employee chart families carry counts and row labels
+            **{name: data[name] for name in ("counts", "rows") if name in data},
+        },
+        "style": style,
+        "libraries": library_versions(),
+    }
+    encoded = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class RenderCache:
+    """Remembers the render key of every PNG written, so unchanged charts can be skipped"""
+
+    def __init__(self, index_path=RENDER_INDEX, force=False):
+        self.index_path = Path(index_path)
+        self.force = force  # Treat every chart as stale, but keep recording keys
+        self.hits = 0
+        self.misses = 0
+        try:
+            with open(self.index_path, encoding="utf-8") as f:
+                self.index = json.load(f)
+        except (OSError, ValueError):
+            self.index = {}
+
+    def is_fresh(self, out_path, key, extra_paths=()):
+        """True (and counted as a hit) when the PNG on disk was rendered from this key
+
+        `extra_paths` (e.g. the chart's smaller variants) must exist as well.
+        """
+        fresh = (not self.force and self.index.get(str(out_path)) == key
+                 and all(Path(p).exists() for p in (out_path, *extra_paths)))
+        if fresh:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return fresh
+
+    def record(self, out_path, key):
+        self.index[str(out_path)] = key
+
+    def save(self):
+        """Write the index atomically"""
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix="index.", suffix=".json", dir=self.index_path.parent)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(self.index, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.index_path)
+
+    def summary(self):
+        total = self.hits + self.misses
+        rate = 100 * self.hits / total if total else 0
+        return f"Render cache: {self.hits} hits, {self.misses} misses ({rate:.0f}% skipped)"
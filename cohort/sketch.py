@@ -0,0 +1,189 @@
+import numpy as np
+
+# Items kept per weight level of a sketch; the rank error stays below about
+# 3 / k (see sketch_capacity)
+DEFAULT_SKETCH_K = 256
+
+
+def sketch_capacity(rank_error):
+    """Items per level that keep the max rank error within `rank_error` (e.g. 0.01 for 1%)
+
+    A full level is halved as a whole, so a level holds between k / 2 and k
+    items; 3 / rank_error was measured to stay within the error for streams
+    of up to 2M values fed in chunks of any size (`python -m cohort.sketch`).
+    """
+    return max(8, int(np.ceil(3.0 / rank_error)))
+
+
+def _level(weight):
+    """Weight level of items whose weights are powers of two"""
+    return np.frexp(weight)[1].astype(np.int64) - 1
+
+
+def compact(group, value, weight, k, rng=None):
+    """KLL compaction of weighted items, for many groups at once
+
+    Items are given in ascending value order with the group they belong to.
+    Whenever a group holds more than `k` items of one weight, every other
+    item of that level is dropped (random offset) and the survivors double
+    their weight, until every level fits. Order is preserved; groups that
+    never exceed `k` items per level stay exact.
+
+    `rng` is a np.random.Generator (or a seed). Callers that compact
+    repeatedly must pass the same Generator each time: restarting from one
+    seed repeats the same offsets, so the errors pile up in one direction
+    instead of cancelling out.
+    """
+    rng = np.random.default_rng(rng)
+    group, value, weight = np.asarray(group), np.asarray(value), np.asarray(weight)
+    while len(group):
+        level = _level(weight)
+        key = group.astype(np.int64) * 64 + level
+        order = np.argsort(key, kind="stable")
+        sorted_key = key[order]
+        starts = np.flatnonzero(np.r_[True, sorted_key[1:] != sorted_key[:-1]])
+        counts = np.diff(np.r_[starts, len(order)])
+        if counts.max() <= k:
+            break
+        full = counts > k
+        # Pair up items of the full levels; an odd last item stays as it is
+        position = np.arange(len(order)) - np.repeat(starts, counts)
+        size = np.repeat(counts, counts)
+        paired = np.repeat(full, counts) & (position < size - size % 2)
+        offset = np.repeat(rng.integers(0, 2, len(counts)), counts)
+        drop = np.zeros(len(group), dtype=bool)
+        drop[order[paired & (position % 2 != offset)]] = True
+        promote = np.zeros(len(group), dtype=bool)
+        promote[order[paired & (position % 2 == offset)]] = True
+        weight = np.where(promote, weight * 2, weight)
+        keep = ~drop
+        group, value, weight = group[keep], value[keep], weight[keep]
+    return group, value, weight
+
+
+def share_means(group, value, weight, n_groups, share):
+    """Weighted mean of the bottom and top `share` of each group's mass
+
+    Items are sorted by group, in ascending value order within each group
+    (groups 0..n_groups-1). Each side covers
+    ceil(share * total weight) units, with the boundary item counted
+    partially, so unit weights give the exact top / bottom means.
+    """
+    cumulative = np.cumsum(weight, dtype=np.float64)
+    totals = np.bincount(group, weight, n_groups)
+    starts = np.cumsum(totals) - totals
+    within = cumulative - starts[group]  # weight up to and including the item
+    k = np.ceil(totals * share)
+    below = within - weight
+    above = totals[group] - within
+    bottom = np.clip(k[group] - below, 0, weight)
+    top = np.clip(k[group] - above, 0, weight)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return (np.where(k > 0, np.bincount(group, bottom * value, n_groups) / k, np.nan),
+                np.where(k > 0, np.bincount(group, top * value, n_groups) / k, np.nan))
+
+
+def exact_share_means(values, share):
+    """Exact (bottom, top) `share` means of one group by partition-based selection"""
+    values = np.asarray(values, dtype=np.float64)
+    values = values[~np.isnan(values)]
+    k = int(np.ceil(len(values) * share))
+    if k == 0:
+        return np.nan, np.nan
+    if k >= len(values):
+        return values.mean(), values.mean()
+    low = np.partition(values, k - 1)[:k]
+    high = np.partition(values, len(values) - k)[len(values) - k:]
+    return low.mean(), high.mean()
+
+
+class QuantileSketch:
+    """Mergeable KLL-style quantile sketch of one stream of values
+
+    Values are buffered and answered exactly (partition-based selection)
+    until the buffer holds more than `exact_limit`; after that they are
+    sorted and compacted into weighted items.
+    """
+
+    def __init__(self, k=DEFAULT_SKETCH_K, exact_limit=None, seed=0):
+        self.k = k
+        self.exact_limit = k if exact_limit is None else exact_limit
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)  # drawn from by every compaction
+        self.buffer = np.empty(0)
+        self.values = np.empty(0)
+        self.weights = np.empty(0, dtype=np.int64)
+
+    def __len__(self):
+        return int(self.weights.sum()) + len(self.buffer)
+
+    @property
+    def exact(self):
+        return not len(self.values)
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64).ravel()
+        self.buffer = np.concatenate([self.buffer, values[~np.isnan(values)]])
+        if len(self.buffer) > self.exact_limit or not self.exact:
+            self._compact()
+        return self
+
+    def merge(self, other):
+        """New sketch over both streams"""
+        merged = QuantileSketch(self.k, self.exact_limit, self.seed)
+        merged.rng = self.rng
+        merged.buffer = np.concatenate([self.buffer, other.buffer])
+        merged.values = np.concatenate([self.values, other.values])
+        merged.weights = np.concatenate([self.weights, other.weights])
+        if len(merged.buffer) > merged.exact_limit or not merged.exact:
+            merged._compact()
+        return merged
+
+    def _compact(self):
+        values = np.concatenate([self.values, self.buffer])
+        weights = np.concatenate([self.weights, np.ones(len(self.buffer), dtype=np.int64)])
+        order = np.argsort(values, kind="stable")
+        _, self.values, self.weights = compact(np.zeros(len(values), dtype=np.int64),
+                                               values[order], weights[order], self.k, self.rng)
+        self.buffer = np.empty(0)
+
+    def quantile(self, q):
+        """Value at rank q (0..1)"""
+        if self.exact:
+            return float(np.quantile(self.buffer, q)) if len(self.buffer) else np.nan
+        cumulative = np.cumsum(self.weights)
+        index = np.searchsorted(cumulative, q * cumulative[-1], side="left")
+        return float(self.values[min(index, len(self.values) - 1)])
+
+    def share_means(self, share):
+        """(bottom, top) means of the lowest and highest `share` of the stream"""
+        if self.exact:
+            return exact_share_means(self.buffer, share)
+        bottom, top = share_means(np.zeros(len(self.values), dtype=np.intp), self.values,
+                                  self.weights, 1, share)
+        return float(bottom[0]), float(top[0])
+
+    def rank_error(self, values, quantiles=999):
+        """Max rank error of the sketch's quantiles against the exact `values` it was fed"""
+        values = np.sort(np.asarray(values, dtype=np.float64))
+        q = np.linspace(0, 1, quantiles + 2)[1:-1]
+        answers = np.array([self.quantile(p) for p in q])
+        # Any rank the answer occupies (ties span several) counts as exact
+        low = np.searchsorted(values, answers, side="left") / len(values)
+        high = np.searchsorted(values, answers, side="right") / len(values)
+        return float(np.maximum(np.maximum(low - q, q - high), 0).max())
+
+
+if __name__ == "__main__":
+    # Chunked updates must stay within the error sketch_capacity was sized for
+    rng = np.random.default_rng(0)
+    for target in (0.02, 0.01, 0.005):
+        for n, chunk in ((200_000, 7), (200_000, 100), (2_000_000, 1_000), (2_000_000, 100_000)):
+            values = rng.lognormal(size=n)
+            sketch = QuantileSketch(sketch_capacity(target), seed=int(rng.integers(1 << 31)))
+            for start in range(0, n, chunk):
+                sketch.update(values[start:start + chunk])
+            error = sketch.rank_error(values)
+            print(f"target {target:6.1%}  n {n:>9,}  chunk {chunk:>7,}  "
+                  f"rank error {error:6.2%}  {'ok' if error <= target else 'EXCEEDED'}")
+            assert error <= target
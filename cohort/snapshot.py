@@ -0,0 +1,128 @@
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .cache import CACHE_DIR
+from .encoding import CategoryDictionary, encode_employees
+
+# Employee snapshots, one folder each: <name>/<column>.npy, dictionary.json, schema.json
+SNAPSHOT_DIR = CACHE_DIR.parent / "snapshots"
+
+# Bump when the snapshot layout changes; older snapshots are then refused
+SNAPSHOT_VERSION = 1
+
+
+def write_snapshot(employees, name, root=SNAPSHOT_DIR, dictionary=None):
+    """Write an employee frame as a columnar snapshot; returns its folder
+
+    Columns are encoded first (cohort.encoding) unless they already are.
+    Each column is one fixed-width .npy file (category columns hold their
+    integer codes); the labels go to dictionary.json and the column kinds to
+    schema.json. The folder appears atomically, so readers never see a
+    partial snapshot. Without a `dictionary` the shared one at DICTIONARY_PATH
+    is used (and saved when new labels were added), so every snapshot
+    shares one code space.
+    """
+    shared = dictionary is None
+    dictionary = CategoryDictionary.load() if shared else dictionary
+    version = dictionary.version
+    encoded = encode_employees(employees, dictionary)
+    if shared and dictionary.version != version:
+        dictionary.save()
+    folder = Path(root) / name
+    folder.parent.mkdir(parents=True, exist_ok=True)
+    tmp = Path(tempfile.mkdtemp(prefix=f".{name}.", dir=folder.parent))
+    try:
+        columns = {}
+        for column in encoded.columns:
+            values = encoded[column]
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                np.save(tmp / f"{column}.npy", values.cat.codes.to_numpy())
+                columns[column] = "category"
+            else:
+                np.save(tmp / f"{column}.npy", values.to_numpy())
+                columns[column] = "date" if values.dtype.kind == "M" else "number"
+        dictionary.save(tmp / "dictionary.json")
+        with open(tmp / "schema.json", "w", encoding="utf-8") as f:
+            json.dump({"version": SNAPSHOT_VERSION, "rows": len(encoded),
+                       "dictionary_version": dictionary.version, "columns": columns}, f, indent=1)
+        os.rename(tmp, folder)
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    return folder
+
+
+def snapshots(root=SNAPSHOT_DIR):
+    """Names of the snapshots under `root`, ascending"""
+    root = Path(root)
+    if not root.is_dir():
+        return []
+    return sorted(path.name for path in root.iterdir()
+                  if not path.name.startswith(".") and (path / "schema.json").exists())
+
+
+class Snapshot:
+    """Read-only view of a snapshot whose columns are memory-mapped on first use
+
+    Every process that opens the same snapshot shares its pages through the
+    OS page cache; nothing is read until a column is touched, and then only
+    the pages touched.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path / "schema.json", encoding="utf-8") as f:
+            schema = json.load(f)
+        if schema["version"] != SNAPSHOT_VERSION:
+            raise ValueError(f"Snapshot {self.path} has layout v{schema['version']}, "
+                             f"expected v{SNAPSHOT_VERSION}")
+        self.rows = schema["rows"]
+        self.kinds = schema["columns"]  # {column: "category" | "date" | "number"}
+        self.dictionary = CategoryDictionary.load(self.path / "dictionary.json")
+        self._columns = {}
+
+    @classmethod
+    def latest(cls, root=SNAPSHOT_DIR):
+        names = snapshots(root)
+        if not names:
+            raise FileNotFoundError(f"No snapshots in {root}")
+        return cls(Path(root) / names[-1])
+
+    def __repr__(self):
+        return f"Snapshot({self.path.name!r}, {self.rows} rows, {len(self.kinds)} columns)"
+
+    def __len__(self):
+        return self.rows
+
+    def column(self, name):
+        """The stored array of a column (codes for category columns) as a read-only memmap"""
+        if name not in self._columns:
+            if name not in self.kinds:
+                raise KeyError(name)
+            self._columns[name] = np.load(self.path / f"{name}.npy", mmap_mode="r")
+        return self._columns[name]
+
+    def labels(self, name):
+        """Category labels of a category column (index = code)"""
+        return list(self.dictionary.labels[name])
+
+    def frame(self, columns=None):
+        """Employee frame over the mapped columns (cohort.employees layout)
+
+        Number and date columns wrap the memmaps without copying; category
+        columns become Categoricals over the dictionary labels.
+        """
+        data = {}
+        for name in columns or self.kinds:
+            values = self.column(name)
+            if self.kinds[name] == "category":
+                data[name] = pd.Categorical.from_codes(values, self.labels(name))
+            else:
+                data[name] = values
+        return pd.DataFrame(data, copy=False)
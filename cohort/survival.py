@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+
+from .attrition import completed_months, exit_months, slot_histogram, stacked_slots
+
+# Residency months covered by the retention curves
+RETENTION_HORIZON = 36
+
+
+def retention_curves(joining_date, exit_date, codes, as_of, horizon=RETENTION_HORIZON):
+    """Kaplan-Meier retention by residency month for every category of every dimension
+
+    `codes` maps dimensions to (integer codes, labels). An employee who left
+    after m completed months is an exit in residency month m + 1; one still
+    active is censored after the months completed by `as_of`, so recent
+    joiners only count while they could have been observed. Event times are
+    counting-sorted by one bincount into a (category, month) histogram of exits
+    and of employees leaving the risk set for all dimensions at once; the
+    curves are then a cumulative product along the month axis.
+
+    Returns a DataFrame indexed by (dimension, category) with the joined count
+    and the share still employed after 0..horizon months (column m).
+    """
+    as_of = np.datetime64(as_of, "D")
+    joining = np.asarray(joining_date, dtype="datetime64[D]")
+    months = exit_months(joining, exit_date, as_of)
+    left = months >= 0
+    observed = np.maximum(completed_months(joining, np.full(len(joining), as_of)), 0)
+    # Residency month in which each employee leaves the risk set; later than
+    # the horizon only matters for the at-risk counts
+    width = horizon + 2
+    time = np.minimum(np.where(left, months + 1, observed), horizon + 1)
+    # Exits and censorings share one histogram: columns [0, width) count
+    # censorings and [width, 2 * width) exits
+    bucket = np.where(left & (time <= horizon), time + width, time)
+
+    slots, index = stacked_slots(codes)
+    histogram = slot_histogram(slots, np.tile(bucket, len(codes)), len(index), 2 * width)
+    exits = histogram[:, width:]
+    removed = histogram[:, :width] + exits
+    joined = removed.sum(axis=1)
+    # At risk in month m: everyone not removed in months 0..m-1
+    at_risk = joined[:, None] - np.cumsum(removed, axis=1)[:, :-2]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        hazard = np.where(at_risk > 0, exits[:, 1:horizon + 1] / at_risk, 0.0)
+    survival = np.cumprod(1.0 - hazard, axis=1)
+    curves = np.column_stack([np.ones(len(index)), survival])
+    curves[joined == 0] = np.nan
+
+    frame = pd.DataFrame(curves, index=index, columns=range(horizon + 1))
+    frame.insert(0, "joined", joined)
+    return frame
+
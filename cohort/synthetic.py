@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+
+from .charts import DATA_AS_OF
+from .employees import AVG_MONTH_DAYS
+
+# Category labels (and rough shares) of the study population
+CATEGORIES = {
+    "designation": {
+        "Sales Development Manager": 0.35,
+        "Business Development Manager": 0.25,
+        "Assistant Sales manager": 0.10,
+        "Sales Manager": 0.10,
+        "Sr. Sales manager": 0.06,
+        "Executive sales manager": 0.05,
+        "Senior executive sales manager": 0.03,
+        "Business manager": 0.03,
+        "Senior business manager": 0.02,
+        "executive business manager": 0.01,
+    },
+    "education": {
+        "Secondary": 0.02,
+        "Higher Secondary": 0.08,
+        "Diploma": 0.05,
+        "Graduation": 0.60,
+        "Post Graduation": 0.18,
+        "Professional Degree": 0.04,
+        "Not Applicabl": 0.02,
+        "Certification Course": 0.01,
+    },
+    "gender": {"Male": 0.77, "Female": 0.23},
+    "resume_source": {
+        "Employee Referral": 0.35,
+        "Portal": 0.30,
+        "Others": 0.15,
+        "Not Available": 0.12,
+        "Vendor": 0.08,
+    },
+}
+
+STUDY_START = "2019-01-01"
+
+
+def synthetic_employees(n, seed=0, as_of=DATA_AS_OF, start=STUDY_START):
+    """Random employee records in the cohort.employees layout, for benchmarks and smoke tests"""
+    rng = np.random.default_rng(seed)
+    as_of = np.datetime64(pd.Timestamp(as_of).date(), "D")
+    start = np.datetime64(start, "D")
+    span = int((as_of - start).astype(np.int64))
+
+    joining = start + rng.integers(0, span, n).astype("timedelta64[D]")
+    stay = np.rint(rng.exponential(300, n)).astype("timedelta64[D]")
+    exit_date = joining + stay
+    exit_date[(exit_date > as_of) | (rng.random(n) < 0.2)] = np.datetime64("NaT")
+
+    records = {"joining_date": joining, "exit_date": exit_date}
+    for column, shares in CATEGORIES.items():
+        labels = np.array(list(shares))
+        p = np.fromiter(shares.values(), dtype=np.float64)
+        records[column] = pd.Categorical.from_codes(
+            rng.choice(len(labels), n, p=p / p.sum()), labels)
+
+    records["age_at_joining"] = np.clip(rng.gamma(6.0, 1.2, n) + 20, 20, 52)
+    experience = rng.exponential(18, n)
+    experience[rng.random(n) < 0.25] = 0
+    records["prior_experience"] = np.minimum(np.rint(experience), 346)
+
+    skill = rng.lognormal(-1.0, 0.9, n)
+    records["kpi_combined_cap"] = skill
+    records["kpi1_cap"] = skill * rng.lognormal(0.1, 0.4, n)
+    records["kpi_combined_cap12"] = skill * rng.lognormal(0, 0.2, n)
+    records["kpi1_cap12"] = records["kpi1_cap"] * rng.lognormal(0, 0.2, n)
+
+    first_sale = rng.exponential(6, n) + 1
+    first_sale[rng.random(n) < 0.3] = np.nan
+    records["first_sale_months"] = first_sale
+    records["catpo_m6"] = rng.gamma(4.0, 25_000, n)
+    records["car_m6"] = records["catpo_m6"] * skill * 4
+    return pd.DataFrame(records)
+
+
+def synthetic_ledger(employees, sales_per_month=2.0, seed=0, as_of=DATA_AS_OF, block=100_000):
+    """Random sales ledger (cohort.ledger layout) over the employees' residencies
+
+    Yields one shuffled DataFrame chunk per block of employees, so a ledger
+    of tens of millions of rows never has to exist in memory at once.
+    """
+    rng = np.random.default_rng(seed)
+    as_of = np.datetime64(pd.Timestamp(as_of).date(), "D")
+    joining = employees["joining_date"].to_numpy(dtype="datetime64[D]")
+    end = employees["exit_date"].to_numpy(dtype="datetime64[D]")
+    end = np.where(np.isnat(end) | (end > as_of), as_of, end)
+    days = np.maximum((end - joining).astype(np.int64), 0)
+    for start in range(0, len(joining), block):
+        stop = min(start + block, len(joining))
+        counts = rng.poisson(days[start:stop] / AVG_MONTH_DAYS * sales_per_month)
+        employee = np.repeat(np.arange(start, stop), counts)
+        offset = (rng.random(len(employee)) * days[employee]).astype("timedelta64[D]")
+        order = rng.permutation(len(employee))
+        yield pd.DataFrame({
+            "employee": employee[order],
+            "sale_date": (joining[employee] + offset)[order],
+            "revenue": rng.gamma(2.0, 5_000, len(employee)),
+        })
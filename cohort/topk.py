@@ -0,0 +1,93 @@
+import numpy as np
+
+# Items screened against the heaps per step
+CHUNK_ROWS = 1 << 20
+
+
+class GroupTopK:
+    """Bounded per-group top-k of a stream of scored items, mergeable across partitions
+
+    Each group holds at most k items, ranked by (score, id); `root` and
+    `root_id` hold every full group's worst held item (-inf while a group
+    has fewer than k items). A chunk is screened against all roots at once,
+    and only items that outrank their group's root are merged in: held
+    items and candidates are lexsorted together by (group, score, id) and
+    the last k of each group kept, so whole groups are never sorted. Held
+    items are stored flat (sorted by group, ascending score), so memory
+    follows the items held rather than n_groups * k. Ties keep the item
+    with the larger id, so the result does not depend on chunking or on the
+    order partitions are merged in.
+    """
+
+    def __init__(self, n_groups, k):
+        self.n_groups = n_groups
+        self.k = k
+        self.root = np.full(n_groups, -np.inf)
+        self.root_id = np.full(n_groups, np.iinfo(np.int64).min)
+        self.group = np.empty(0, dtype=np.int64)
+        self.score = np.empty(0)
+        self.id = np.empty(0, dtype=np.int64)
+        self.payload = {}  # {name: values carried with each held item}
+
+    def __len__(self):
+        return len(self.group)
+
+    def counts(self):
+        """Items held per group (at most k)"""
+        return np.bincount(self.group, minlength=self.n_groups)
+
+    def update(self, groups, scores, ids=None, **payload):
+        """Offer scored items; groups < 0 and NaN scores are ignored"""
+        groups = np.asarray(groups, dtype=np.int64)
+        scores = np.asarray(scores, dtype=np.float64)
+        ids = np.arange(len(scores), dtype=np.int64) if ids is None else np.asarray(ids, dtype=np.int64)
+        payload = {name: np.asarray(column) for name, column in payload.items()}
+        for name, column in payload.items():
+            self.payload.setdefault(name, np.empty(0, dtype=column.dtype))
+        for start in range(0, len(scores), CHUNK_ROWS):
+            chunk = slice(start, start + CHUNK_ROWS)
+            g, s, i = groups[chunk], scores[chunk], ids[chunk]
+            candidate = g >= 0
+            g_c, s_c = g[candidate], s[candidate]
+            root = self.root[g_c]
+            candidate[candidate] = (s_c > root) | ((s_c == root) & (i[candidate] > self.root_id[g_c]))
+            if candidate.any():
+                self._push(g[candidate], s[candidate], i[candidate],
+                           {name: column[chunk][candidate] for name, column in payload.items()})
+        return self
+
+    def merge(self, other):
+        """Fold another partition's heaps into this one"""
+        if other.k != self.k or other.n_groups != self.n_groups:
+            raise ValueError("GroupTopK partitions differ in groups or k")
+        return self.update(other.group, other.score, other.id, **other.payload)
+
+    def _push(self, groups, scores, ids, payload):
+        groups = np.concatenate([self.group, groups])
+        scores = np.concatenate([self.score, scores])
+        ids = np.concatenate([self.id, ids])
+        payload = {name: np.concatenate([held, payload[name]]) for name, held in self.payload.items()}
+
+        # Only heap contents and candidates are sorted; keep the k best per group
+        order = np.lexsort((ids, scores, groups))
+        groups = groups[order]
+        counts = np.bincount(groups, minlength=self.n_groups)
+        from_end = np.cumsum(counts)[groups] - np.arange(len(groups))  # 1: a group's best item
+        keep = order[from_end <= self.k]
+
+        self.group, self.score, self.id = groups[from_end <= self.k], scores[keep], ids[keep]
+        self.payload = {name: column[keep] for name, column in payload.items()}
+        full = np.flatnonzero(counts >= self.k)
+        starts = np.cumsum(np.minimum(counts, self.k)) - np.minimum(counts, self.k)
+        self.root[full] = self.score[starts[full]]
+        self.root_id[full] = self.id[starts[full]]
+
+    def items(self):
+        """Held items as flat arrays (group, score, id and payload), ascending score per group"""
+        return {"group": self.group, "score": self.score, "id": self.id, **self.payload}
+
+    def mean(self, name):
+        """Mean of a payload column over each group's top k (NaN for empty groups)"""
+        counts = self.counts()
+        with np.errstate(invalid="ignore"):
+            return np.bincount(self.group, self.payload[name], self.n_groups) / counts
@@ -0,0 +1,140 @@
+import numpy as np
+import pandas as pd
+
+
+def _month_index(dates, start):
+    """Calendar months from `start` (datetime64[M]) to each date; -1 for NaT"""
+    months = np.asarray(dates, dtype="datetime64[M]")
+    return np.where(np.isnat(months), -1, (months - start).astype(np.int64))
+
+
+class RetentionTriangle:
+    """Join-month x residency-month retention counts, per category of every dimension
+
+    Cell (j, m) of a triangle is the share of the employees who joined in
+    month j that are still employed at the end of calendar month j + m
+    (calendar month offsets, as cohort triangles are usually drawn;
+    cohort.attrition counts completed months instead). Only additive counts
+    are kept per dimension: joiners per (category, join month) and exits per
+    (category, join month, month offset of the exit). Shares are a cumulative
+    sum along the offset axis at read time, so a new month of data is two
+    bincounts added in place (append_month) rather than a rebuild.
+    """
+
+    def __init__(self, start):
+        self.start = np.datetime64(start, "M")
+        self.n_months = 0
+        self.labels = {"Overall": ["Overall"]}
+        self.joined = {"Overall": np.zeros((1, 0), dtype=np.int64)}
+        self.exits = {"Overall": np.zeros((1, 0, 0), dtype=np.int64)}
+
+    def __repr__(self):
+        return (f"RetentionTriangle({self.start} + {self.n_months} months, "
+                f"{len(self.labels) - 1} dimensions)")
+
+    @property
+    def last_month(self):
+        return self.start + (self.n_months - 1)
+
+    @classmethod
+    def build(cls, joining_date, exit_date, codes, as_of, start=None):
+        """Triangle of all records up to the month of `as_of`
+
+        `codes` maps dimensions to (integer codes, labels) as in
+        cohort.employees.dimension_codes; `start` defaults to the first joining month.
+        """
+        joining = np.asarray(joining_date, dtype="datetime64[M]")
+        start = joining.min() if start is None else start
+        triangle = cls(start)
+        triangle._grow(_month_index(np.datetime64(as_of, "M"), triangle.start) + 1)
+        triangle._add(joining_date, exit_date, codes)
+        return triangle
+
+    def _grow(self, n_months):
+        """Extend every dimension's arrays to `n_months` join months and offsets"""
+        extra = n_months - self.n_months
+        if extra <= 0:
+            return
+        for dimension in self.joined:
+            self.joined[dimension] = np.pad(self.joined[dimension], ((0, 0), (0, extra)))
+            self.exits[dimension] = np.pad(self.exits[dimension], ((0, 0), (0, extra), (0, extra)))
+        self.n_months = n_months
+
+    def _align(self, dimension, dim_codes, labels):
+        """Codes relabelled onto this triangle's categories (new categories are appended)"""
+        known = self.labels.setdefault(dimension, [])
+        known += [label for label in labels if label not in known]
+        if dimension not in self.joined:
+            self.joined[dimension] = np.zeros((0, self.n_months), dtype=np.int64)
+            self.exits[dimension] = np.zeros((0, self.n_months, self.n_months), dtype=np.int64)
+        extra = len(known) - len(self.joined[dimension])
+        if extra:
+            self.joined[dimension] = np.pad(self.joined[dimension], ((0, extra), (0, 0)))
+            self.exits[dimension] = np.pad(self.exits[dimension], ((0, extra), (0, 0), (0, 0)))
+        # The trailing -1 keeps unknown codes unknown
+        remap = np.array([known.index(label) for label in labels] + [-1], dtype=np.int64)
+        return remap[dim_codes]
+
+    def _add(self, joining_date, exit_date, codes, joiners=None, leavers=None):
+        """Count joiners and exits of the given rows (masks default to every row in range)"""
+        join = _month_index(joining_date, self.start)
+        exit_month = _month_index(exit_date, self.start)
+        offset = exit_month - join
+        n = self.n_months
+        in_range = (join >= 0) & (join < n)
+        joiners = in_range if joiners is None else joiners & in_range
+        left = in_range & (exit_month >= 0) & (offset >= 0) & (exit_month < n)
+        leavers = left if leavers is None else leavers & left
+
+        codes = {"Overall": (np.zeros(len(join), dtype=np.int64), ["Overall"]), **codes}
+        for dimension, (dim_codes, labels) in codes.items():
+            dim_codes = self._align(dimension, np.asarray(dim_codes), labels)
+            n_categories = len(self.labels[dimension])
+            rows = joiners & (dim_codes >= 0)
+            self.joined[dimension] += np.bincount(
+                dim_codes[rows] * n + join[rows], minlength=n_categories * n).reshape(n_categories, n)
+            rows = leavers & (dim_codes >= 0)
+            cells = (dim_codes[rows] * n + join[rows]) * n + offset[rows]
+            self.exits[dimension] += np.bincount(
+                cells, minlength=n_categories * n * n).reshape(n_categories, n, n)
+
+    def append_month(self, joining_date, exit_date, codes, month=None):
+        """Add the next month of data in place
+
+        The rows may be the whole employee history or just the month's changes:
+        only employees who joined or left in the new month are counted.
+        """
+        month = self.last_month + 1 if month is None else np.datetime64(month, "M")
+        self._grow(_month_index(month, self.start) + 1)
+        index = _month_index(month, self.start)
+        joiners = _month_index(joining_date, self.start) == index
+        leavers = _month_index(exit_date, self.start) == index
+        self._add(joining_date, exit_date, codes, joiners, leavers)
+        return self
+
+    def counts(self, dimension):
+        """(joined, exits) arrays of a dimension"""
+        return self.joined[dimension], self.exits[dimension]
+
+    def categories(self, dimension):
+        return list(self.labels[dimension])
+
+    def shares(self, dimension="Overall"):
+        """(categories, join months, offsets) shares still employed; NaN beyond the last month"""
+        joined, exits = self.counts(dimension)
+        survivors = joined[:, :, None] - np.cumsum(exits, axis=2)
+        months = np.arange(self.n_months)
+        observed = months[:, None] + months[None, :] < self.n_months
+        with np.errstate(invalid="ignore", divide="ignore"):
+            shares = survivors / joined[:, :, None]
+        return np.where(observed & (joined[:, :, None] > 0), shares, np.nan)
+
+    def frame(self, dimension="Overall", category="Overall"):
+        """Triangle of one category: rows are join months, columns month offsets"""
+        position = self.categories(dimension).index(category)
+        months = pd.period_range(pd.Timestamp(self.start), periods=self.n_months, freq="M")
+        frame = pd.DataFrame(self.shares(dimension)[position], index=months,
+                             columns=range(self.n_months))
+        frame.index.name = "join_month"
+        frame.insert(0, "joined", self.counts(dimension)[0][position])
+        return frame
@@ -0,0 +1,291 @@
+import re
+import zipfile
+import posixpath
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+import numpy as np
+
+# Location of the cohort workbook (repository root)
+WORKBOOK_PATH = Path(__file__).resolve().parent.parent / "Test Data cpr 13.xlsx"
+
+# XML namespaces used inside the XLSX package
+NS_MAIN = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+NS_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+NS_PKG_REL = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+# The 17 metric columns of the sheet: (column, metric, cohort, unit)
+# Percentages are stored in the sheet as fractions (0.37 == 37%)
+METRICS = [
+    ("D", "Head Count", "CAP LRM", "Nos"),
+    ("E", "Head Count", "CAP 12", "Nos"),
+    ("F", "Average Cumulative Combined KPI Achievement", "CAP LRM", "%"),
+    ("G", "CAP on Combined KPI Top 10%", "CAP 12", "%"),
+    ("H", "CAP on Combined KPI Bottom 10%", "CAP 12", "%"),
+    ("I", "Performance Multiple Combined KPI", "CAP 12", "Ratio"),
+    ("J", "Average Cumulative KPI 1 Achievement", "CAP LRM", "%"),
+    ("K", "CAP on KPI 1 Top 10%", "CAP 12", "%"),
+    ("L", "CAP on KPI 1 Bottom 10%", "CAP 12", "%"),
+    ("M", "Performance Multiple KPI 1", "CAP 12", "Ratio"),
+    ("N", "Time to First Sale", "CAP LRM", "Months"),
+    ("O", "CAR2CATPO Ratio up to Residency Month 6", "CAP LRM", "Ratio"),
+    ("P", "Attrited Count", "CAP LRM", "Nos"),
+    ("Q", "Average Residency", "CAP LRM", "Months"),
+    ("R", "Average Residency of Top 100 in KPI 1", "CAP LRM", "Months"),
+    ("S", "Six Month Attrition", "CAP LRM", "%"),
+    ("T", "Infant Attrition", "CAP LRM", "%"),
+]
+
+COHORTS = ["CAP LRM", "CAP 12"]
+
+# Dimension block headers in column B mapped to the dashboard folder names
+# (header text is matched case-insensitively with whitespace collapsed)
+DIMENSIONS = {
+    "cohort lrm - all employees in the study": "Overall",
+    "work status at the end of the study": "Work Status",
+    "designation": "Designation",
+    "highest educational qualifications": "Highest Educational Qualification",
+    "gender": "Gender",
+    "resume source": "Resume Source",
+    "quantum of prior experience (months)": "Prior Experience",
+    "age grouping on the date of joining the role in years": "Age group",
+}
+
+# Suffix for dimensions whose categories are numeric (lower, upper] ranges
+RANGE_SUFFIX = {
+    "Prior Experience": " Months",
+    "Age group": "",
+}
+
+OVERALL_CATEGORY = "Cohort LRM"
+SUBTOTAL_CATEGORY = "Sub total"
+
+_CELL_REF = re.compile(r"([A-Z]+)(\d+)")
+_METRIC_COLUMNS = {column: i for i, (column, _, _, _) in enumerate(METRICS)}
+
+
+class CohortTable:
+    """Typed in-memory table of the cohort sheet keyed by (dimension, category, metric, cohort)"""
+
+    def __init__(self, rows, values):
+        self.rows = list(rows)  # [(dimension, category), ...]
+        self.values = np.asarray(values, dtype=np.float64)  # shape (len(rows), len(METRICS))
+        self.metrics = [(metric, cohort) for _, metric, cohort, _ in METRICS]
+        self.units = {(metric, cohort): unit for _, metric, cohort, unit in METRICS}
+        self._row_index = {key: i for i, key in enumerate(self.rows)}
+        self._metric_index = {key: i for i, key in enumerate(self.metrics)}
+        self.load_info = None  # set by cohort.cache.load_table
+
+    def __repr__(self):
+        return f"CohortTable({len(self.dimensions())} dimensions, {len(self.rows)} rows, {len(self.metrics)} metrics)"
+
+    def dimensions(self):
+        """Dimension names in sheet order"""
+        return list(dict.fromkeys(dimension for dimension, _ in self.rows))
+
+    def categories(self, dimension, include_subtotal=False):
+        """Category labels of a dimension in sheet order"""
+        return [category for dim, category in self.rows
+                if dim == dimension and (include_subtotal or category != SUBTOTAL_CATEGORY)]
+
+    def get(self, dimension, category, metric, cohort):
+        """Single value for a (dimension, category, metric, cohort) key; NaN when NA"""
+        try:
+            row = self._row_index[(dimension, category)]
+            col = self._metric_index[(metric, cohort)]
+        except KeyError:
+            raise KeyError((dimension, category, metric, cohort)) from None
+        return float(self.values[row, col])
+
+    def series(self, dimension, metric, cohort, include_subtotal=False):
+        """Categories and values of one metric across a dimension"""
+        categories = self.categories(dimension, include_subtotal)
+        col = self._metric_index[(metric, cohort)]
+        rows = [self._row_index[(dimension, category)] for category in categories]
+        return categories, self.values[rows, col]
+
+    def records(self):
+        """Iterate (dimension, category, metric, cohort, value) tuples"""
+        for (dimension, category), row in zip(self.rows, self.values):
+            for (metric, cohort), value in zip(self.metrics, row):
+                yield dimension, category, metric, cohort, float(value)
+
+
+def _normalize(text):
+    return " ".join(text.split()).lower()
+
+
+def _format_bound(value):
+    return f"{value:g}" if value == int(value) else f"{value:.0f}"
+
+
+def _range_label(lower, upper, suffix):
+    """Label for a (lower, upper] range category such as '22-25' or '0-6 Months'"""
+    if lower == upper:
+        return f"{_format_bound(lower)}{suffix}"
+    return f"{_format_bound(lower)}-{_format_bound(upper)}{suffix}"
+
+
+def _iter_elements(stream, tag):
+    """Stream the given elements from an XML file, detaching each after use"""
+    parents = []
+    for event, elem in ET.iterparse(stream, events=("start", "end")):
+        if event == "start":
+            parents.append(elem)
+            continue
+        parents.pop()
+        if elem.tag == tag:
+            yield elem
+            # Drop the finished element so memory stays bounded by one element
+            elem.clear()
+            if parents:
+                parents[-1].remove(elem)
+
+
+def _read_shared_strings(archive):
+    """Shared string table (only unique strings are held in memory)"""
+    if "xl/sharedStrings.xml" not in archive.namelist():
+        return []
+    strings = []
+    with archive.open("xl/sharedStrings.xml") as stream:
+        for si in _iter_elements(stream, f"{{{NS_MAIN}}}si"):
+            # Plain <t> or rich-text runs <r><t>; phonetic runs <rPh> are skipped
+            parts = [t.text or "" for t in si.findall(f"{{{NS_MAIN}}}t")]
+            parts += [t.text or "" for t in si.findall(f"{{{NS_MAIN}}}r/{{{NS_MAIN}}}t")]
+            strings.append("".join(parts))
+    return strings
+
+
+def _first_sheet_path(archive):
+    """Resolve the part name of the first worksheet through workbook.xml and its rels"""
+    workbook = ET.fromstring(archive.read("xl/workbook.xml"))
+    sheet = workbook.find(f"{{{NS_MAIN}}}sheets/{{{NS_MAIN}}}sheet")
+    rel_id = sheet.get(f"{{{NS_REL}}}id")
+    rels = ET.fromstring(archive.read("xl/_rels/workbook.xml.rels"))
+    for rel in rels.findall(f"{{{NS_PKG_REL}}}Relationship"):
+        if rel.get("Id") == rel_id:
+            target = rel.get("Target")
+            if target.startswith("/"):
+                return target.lstrip("/")
+            return posixpath.normpath(posixpath.join("xl", target))
+    return "xl/worksheets/sheet1.xml"
+
+
+def _cell_value(cell, shared_strings):
+    """Python value of a <c> element: str, float or None (errors and blanks are None)"""
+    cell_type = cell.get("t", "n")
+    if cell_type == "inlineStr":
+        node = cell.find(f"{{{NS_MAIN}}}is")
+        return "".join(t.text or "" for t in node.iter(f"{{{NS_MAIN}}}t")) if node is not None else None
+    v = cell.find(f"{{{NS_MAIN}}}v")
+    if v is None or v.text is None or cell_type == "e":
+        return None
+    if cell_type == "s":
+        return shared_strings[int(v.text)]
+    if cell_type in ("str", "b"):
+        return v.text
+    return float(v.text)
+
+
+def _column_index(letters):
+    index = 0
+    for ch in letters:
+        index = index * 26 + (ord(ch) - 64)
+    return index
+
+
+def _iter_sheet_rows(stream, shared_strings):
+    """Yield {column_letter: value} per non-empty row of the worksheet in one pass"""
+    row_tag = f"{{{NS_MAIN}}}row"
+    cell_tag = f"{{{NS_MAIN}}}c"
+    for row in _iter_elements(stream, row_tag):
+        cells = {}
+        position = 0
+        for cell in row.iter(cell_tag):
+            ref = cell.get("r")
+            if ref:
+                letters = _CELL_REF.match(ref).group(1)
+                position = _column_index(letters)
+            else:
+                # Cell references are optional; fall back to the running position
+                position += 1
+                letters = _column_letters(position)
+            value = _cell_value(cell, shared_strings)
+            if value is not None:
+                cells[letters] = value
+        if cells:
+            yield cells
+
+
+def _column_letters(index):
+    letters = ""
+    while index:
+        index, rem = divmod(index - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+def _metric_row(cells):
+    """Metric values of a row as floats (NaN for 'NA', errors and blanks), or None if no numbers"""
+    values = np.full(len(METRICS), np.nan)
+    has_number = False
+    for column, i in _METRIC_COLUMNS.items():
+        value = cells.get(column)
+        if isinstance(value, float):
+            values[i] = value
+            has_number = True
+    return values if has_number else None
+
+
+def parse_rows(stream, shared_strings):
+    """Classify sheet rows into (dimension, category, values) records"""
+    dimension = None
+    for cells in _iter_sheet_rows(stream, shared_strings):
+        if "A" in cells:
+            # Block header ("Over All of Cohort LRM" / "Input variables")
+            dimension = None
+            continue
+
+        label_b = cells.get("B")
+        label_c = cells.get("C")
+        if isinstance(label_b, str) and _normalize(label_b) in DIMENSIONS:
+            dimension = DIMENSIONS[_normalize(label_b)]
+
+        values = _metric_row(cells)
+        if values is None or dimension is None:
+            continue
+
+        if dimension == "Overall":
+            category = OVERALL_CATEGORY
+        elif isinstance(label_b, float) and isinstance(label_c, float):
+            category = _range_label(label_b, label_c, RANGE_SUFFIX.get(dimension, ""))
+        elif isinstance(label_c, str) and _normalize(label_c) == _normalize(SUBTOTAL_CATEGORY):
+            category = SUBTOTAL_CATEGORY
+        elif isinstance(label_c, str):
+            category = label_c.strip()
+        else:
+            continue
+        yield dimension, category, values
+
+
+def load_workbook(path=WORKBOOK_PATH):
+    """Parse the cohort sheet in one streaming pass into a CohortTable"""
+    with zipfile.ZipFile(path) as archive:
+        shared_strings = _read_shared_strings(archive)
+        with archive.open(_first_sheet_path(archive)) as stream:
+            rows, values, seen = [], [], set()
+            for dimension, category, metric_values in parse_rows(stream, shared_strings):
+                # The second block of the sheet repeats the overall row
+                if (dimension, category) in seen:
+                    continue
+                seen.add((dimension, category))
+                rows.append((dimension, category))
+                values.append(metric_values)
+    return CohortTable(rows, np.vstack(values) if values else np.empty((0, len(METRICS))))
+
+
+if __name__ == "__main__":
+    table = load_workbook()
+    print(table)
+    for dimension in table.dimensions():
+        print(f"{dimension}: {', '.join(table.categories(dimension, include_subtotal=True))}")
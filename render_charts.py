@@ -0,0 +1,52 @@
+import argparse
+import time
+
+from cohort.cache import load_table
+from cohort.charts import CHART_SPECS, DASHBOARD_DIMENSIONS, DPI, EMPLOYEE_CHART_SPECS
+from cohort.employees import employee_retention, employee_triangle
+from cohort.encoding import CategoryDictionary, read_employees
+from cohort.render import OUTPUT_ROOT, render_all
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Regenerate the dashboard charts from 'Test Data cpr 13.xlsx'")
+    parser.add_argument("--dimension", action="append", choices=DASHBOARD_DIMENSIONS,
+                        help="Only render this dimension folder (repeatable)")
+    parser.add_argument("--family", action="append", choices=[*CHART_SPECS, *EMPLOYEE_CHART_SPECS],
+                        help="Only render this plot family (repeatable)")
+    parser.add_argument("--out", default=str(OUTPUT_ROOT),
+                        help="Folder that holds the dimension folders")
+    parser.add_argument("--dpi", type=int, default=DPI)
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Render in a process pool of this size (0 = one per CPU)")
+    parser.add_argument("--threads", type=int, default=1,
+                        help="Render concurrently in this many threads (0 = one per CPU)")
+    parser.add_argument("--force", action="store_true",
+                        help="Re-render every chart even if its render key is unchanged")
+    parser.add_argument("--employees", metavar="CSV",
+                        help="Employee records (see cohort.employees) for the retention charts")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    table = load_table()
+    info = table.load_info
+    print(f"Workbook: cache {'hit' if info.hit else 'miss'} in {info.seconds * 1000:.1f} ms "
+          f"({info.digest[:12]})")
+    views = None
+    if args.employees:
+        # Labels are encoded against the shared dictionary, which keeps any new ones
+        dictionary = CategoryDictionary.load()
+        employees = read_employees(args.employees, dictionary)
+        dictionary.save()
+        views = {"retention": employee_retention(employees),
+                 "triangle": employee_triangle(employees)}
+    written = render_all(table, out_root=args.out, dimensions=args.dimension,
+                         families=args.family, dpi=args.dpi,
+                         workers=args.workers, threads=args.threads,
+                         force=args.force, views=views)
+    print(f"\nRendered {len(written)} charts in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
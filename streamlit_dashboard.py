@@ -1,5 +1,8 @@
 import streamlit as st
 import os
+import json
+import threading
+from collections import OrderedDict
 from pathlib import Path
 
 # Configuration - Easily customizable
@@ -18,18 +21,159 @@ CONFIG = {
         "Plot2 Performance Indicators KPI Combined",  # Now 2nd button - KPI Combined
         "Plot3 Performance Indicators KPI 1",         # Now 3rd button - KPI 1
         "Plot4 Revenue Indicators",
-        "Plot5 Attrition Indicators"
+        "Plot5 Attrition Indicators",
+        "Plot6 Retention Curves",                     # Plot6/Plot7 need render_charts.py --employees
+        "Plot7 Retention Triangle",
     ],
+    # Metrics never drawn for a filter ("skip_dimensions" in cohort/charts.py);
+    # their buttons are hidden. Work Status is the outcome the retention charts measure.
+    "skipped_metrics": {
+        "Work Status": ["Plot6 Retention Curves", "Plot7 Retention Triangle"],
+    },
     "graphs_folder": ".",  # Current folder (since you're running from VER4-COR-13)
-    "image_extension": ".png"
+    "image_extension": ".png",
+    # Written by render_charts.py: one entry per chart file (filter, metric, variant, path, ...)
+    "manifest": "manifest.json",
+    # Smaller copies written by render_charts.py, smallest suitable first
+    "variants_folder": "variants",
+    "display_variants": ["display.webp", "preview.png"],
+    # Encoded image bytes kept in memory, shared by all sessions
+    "image_cache_mb": 64
 }
 
+class ImageByteCache:
+    """Size-bounded LRU of image file contents, keyed by (path, version)"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get(self, path, version):
+        key = (path, version)
+        with self.lock:
+            data = self.entries.get(key)
+            if data is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return data
+            self.misses += 1
+        with open(path, "rb") as f:
+            data = f.read()
+        with self.lock:
+            if key not in self.entries and len(data) <= self.max_bytes:
+                self.entries[key] = data
+                self.size += len(data)
+                while self.size > self.max_bytes:
+                    _, evicted = self.entries.popitem(last=False)
+                    self.size -= len(evicted)
+                    self.evictions += 1
+        return data
+
+    def stats(self):
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "mb": self.size / 2**20,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+@st.cache_resource(show_spinner=False)
+def get_image_cache():
+    """One image byte cache per server process, shared across sessions and reruns"""
+    return ImageByteCache(CONFIG["image_cache_mb"] * 2**20)
+
+def get_image_bytes(image_path, entry=None):
+    """Image contents from the shared cache, or None when the file cannot be read
+
+    With a manifest entry the cache key is its sha256 and size, so a cached
+    image needs no filesystem call; without one a rewritten file gets a new
+    key from its modification time.
+    """
+    try:
+        if entry is not None:
+            version = (entry["sha256"], entry["size"])
+        else:
+            stat = os.stat(image_path)
+            version = (stat.st_mtime_ns, stat.st_size)
+        return get_image_cache().get(image_path, version)
+    except OSError:
+        return None
+
+def get_manifest_version():
+    """Modification time of the manifest, or None when there is no manifest"""
+    try:
+        return os.stat(os.path.join(CONFIG["graphs_folder"], CONFIG["manifest"])).st_mtime_ns
+    except OSError:
+        return None
+
+@st.cache_data(show_spinner=False)
+def load_image_index(manifest_version):
+    """Index {(filter, metric): {variant: entry}} from the manifest, loaded once per manifest version"""
+    if manifest_version is None:
+        return None
+    with open(os.path.join(CONFIG["graphs_folder"], CONFIG["manifest"]), encoding="utf-8") as f:
+        manifest = json.load(f)
+    index = {}
+    for entry in manifest["charts"]:
+        entry = dict(entry, path=os.path.join(CONFIG["graphs_folder"], *entry["path"].split("/")))
+        index.setdefault((entry["filter"], entry["metric"]), {})[entry["variant"]] = entry
+    return index
+
+def get_image_index():
+    """Current image index (None falls back to checking the filesystem)"""
+    return load_image_index(get_manifest_version())
+
+def get_filters(index):
+    """Configured filters, plus any extra filter folders listed in the manifest"""
+    filters = list(CONFIG["filters"])
+    if index:
+        filters += sorted({f for f, _ in index} - set(filters))
+    return filters
+
+def get_metrics(filter_name):
+    """Configured metrics drawn for a filter"""
+    skipped = CONFIG["skipped_metrics"].get(filter_name, [])
+    return [metric for metric in CONFIG["metrics"] if metric not in skipped]
+
 def get_image_path(filter_name, metric_name):
     """Generate the file path for a specific filter-metric combination"""
     return os.path.join(CONFIG["graphs_folder"], filter_name, metric_name + CONFIG["image_extension"])
 
-def check_image_exists(image_path):
-    """Check if the image file exists"""
+def get_image_entry(filter_name, metric_name, variant, index=None):
+    """Manifest entry of one chart file, or None without an index"""
+    if index is None:
+        return None
+    return index.get((filter_name, metric_name), {}).get(variant)
+
+def get_display_image(filter_name, metric_name, index=None):
+    """(path, manifest entry) of the smallest pre-rendered variant suitable for the page,
+    falling back to the original"""
+    for variant in CONFIG["display_variants"]:
+        if index is not None:
+            entry = get_image_entry(filter_name, metric_name, variant.split(".")[0], index)
+            if entry:
+                return entry["path"], entry
+            continue
+        variant_path = os.path.join(CONFIG["graphs_folder"], filter_name, CONFIG["variants_folder"],
+                                    f"{metric_name}.{variant}")
+        if os.path.exists(variant_path):
+            return variant_path, None
+    return (get_image_path(filter_name, metric_name),
+            get_image_entry(filter_name, metric_name, "original", index))
+
+def check_image_exists(image_path, filter_name=None, metric_name=None, index=None):
+    """Check if the image file exists (a manifest lookup when an index is available)"""
+    if index is not None:
+        return "original" in index.get((filter_name, metric_name), {})
     return os.path.exists(image_path)
 
 def main():
@@ -43,10 +187,12 @@ def main():
     st.markdown("---")
     
     # Sidebar for filter selection
+    index = get_image_index()
+    
     st.sidebar.header("🔍 Select Filter")
     selected_filter = st.sidebar.selectbox(
         "Choose a filter:",
-        CONFIG["filters"],
+        get_filters(index),
         index=0
     )
     
@@ -56,7 +202,8 @@ def main():
         st.markdown(f"Select a metric to view the visualization for **{selected_filter}**")
         
         # Create columns for metric buttons
-        cols = st.columns(len(CONFIG["metrics"]))
+        metrics = get_metrics(selected_filter)
+        cols = st.columns(len(metrics))
         
         # Track which metric is selected
         if 'selected_metric' not in st.session_state:
@@ -70,12 +217,17 @@ def main():
             st.session_state.current_filter = selected_filter
         
         # Create metric selection buttons
-        for i, metric in enumerate(CONFIG["metrics"]):
+        for i, metric in enumerate(metrics):
             with cols[i]:
+                # Charts missing from the manifest are known up front
+                available = check_image_exists(get_image_path(selected_filter, metric),
+                                               selected_filter, metric, index)
                 if st.button(
                     f"📊 {metric}",
                     key=f"btn_{selected_filter}_{metric}",
-                    use_container_width=True
+                    use_container_width=True,
+                    disabled=not available,
+                    help=None if available else "Chart not rendered yet - run render_charts.py"
                 ):
                     st.session_state.selected_metric = metric
         
@@ -88,14 +240,27 @@ def main():
             
             st.subheader(f"📊 {selected_filter} - {metric}")
             
-            if check_image_exists(image_path):
-                # Display the image
+            image_bytes = None
+            if check_image_exists(image_path, selected_filter, metric, index):
+                # A file listed in the manifest may still have been removed since
+                image_bytes = get_image_bytes(*get_display_image(selected_filter, metric, index))
+            
+            if image_bytes is not None:
+                # Display the smaller variant; the 300-dpi original only on demand
                 st.image(
-                    image_path,
+                    image_bytes,
                     caption=f"{selected_filter} - {metric}",
                     use_column_width=True
                 )
                 
+                if st.toggle("🔍 Show full resolution", key=f"full_{selected_filter}_{metric}"):
+                    original = get_image_bytes(
+                        image_path, get_image_entry(selected_filter, metric, "original", index))
+                    if original is not None:
+                        st.image(original, use_column_width=True)
+                    else:
+                        st.error(f"❌ Image not found: `{image_path}`")
+                
                 # Additional info
                 st.info(f"📁 Image path: `{image_path}`")
                 
@@ -110,6 +275,13 @@ def main():
             # Show instruction when no metric is selected
             st.info("👆 Click on any metric button above to view the visualization")
     
+    stats = get_image_cache().stats()
+    st.sidebar.caption(
+        f"🗄️ Image cache: {stats['entries']} images, {stats['mb']:.1f} MB · "
+        f"{stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.0%}), "
+        f"{stats['evictions']} evicted"
+    )
+    
     # Footer with instructions
     st.markdown("---")
     with st.expander("ℹ️ Setup Instructions"):
@@ -134,6 +306,13 @@ def main():
         └── ... (other filter folders with same 5 PNG files)
         ```
         
+        **To Regenerate the Charts:**
+        Run `python render_charts.py` after updating `Test Data cpr 13.xlsx`.
+        All PNGs above are rendered from the workbook in a single process.
+        `Plot6 Retention Curves.png` and `Plot7 Retention Triangle.png` are drawn
+        from employee records instead:
+        `python render_charts.py --employees employees.csv`.
+
         **To Add More Filters:**
         1. Add your remaining filter folder names to `CONFIG["filters"]` list
         2. Each folder should contain the same 5 PNG files with exact names as specified